@@ -4,30 +4,71 @@ SQL database connection handling with the async/await syntax.
 
 from __future__ import annotations
 
-import dataclasses
+import asyncio
+import functools
+import itertools
 import logging
+import operator
+import weakref
 from contextlib import asynccontextmanager
 from contextvars import ContextVar
 from typing import (
+    Any,
     AsyncIterator,
-    ClassVar,
     Dict,
     Generator,
+    Iterable,
     List,
     Optional,
+    Tuple,
     Type,
     TypeVar,
+    Union,
 )
 
 import asyncpg
 
 from .connection.async_database import BasicConnection, ConnectionParameters
-from .query.base import DataClass, is_dataclass_instance
-from .query.core import DEFAULT, is_dataclass_type
+from .query.base import (
+    DataClass,
+    get_field_plan,
+    get_table_identifier,
+    get_table_name,
+    is_dataclass_instance,
+    quote_identifier,
+)
+from .query.core import DEFAULT, Query, is_dataclass_type
 from .query.query import insert_or_select, select
 
 T = TypeVar("T")
 
+# batches with fewer rows are sent with INSERT statements since COPY has a setup cost
+_COPY_THRESHOLD = 1000
+
+# temporary table that rows are copied into when they are inserted with conflicts ignored
+_BULK_INSERT_TABLE = "pylinsql_bulk_insert"
+
+
+class _PoolConnectionContext:
+    "Acquires a connection from a pool on entry and releases it on exit."
+
+    __slots__ = ("pool", "conn")
+
+    pool: asyncpg.pool.Pool
+    conn: Optional[asyncpg.Connection]
+
+    def __init__(self, pool: asyncpg.pool.Pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self) -> DatabaseConnection:
+        self.conn = await self.pool.acquire()
+        return DatabaseConnection(self.conn)
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        conn, self.conn = self.conn, None
+        await self.pool.release(conn)
+
 
 class DatabasePool:
     """
@@ -37,76 +78,63 @@ class DatabasePool:
     from the pool, then used, and then released back to the pool.
     """
 
+    __slots__ = ("pool",)
+
     pool: asyncpg.pool.Pool
 
     def __init__(self, pool):
         self.pool = pool
 
-    @asynccontextmanager
-    async def connection(self) -> AsyncIterator[DatabaseConnection]:
-        conn = await self.pool.acquire()
-        try:
-            yield DatabaseConnection(conn)
-        finally:
-            await self.pool.release(conn)
-
-    async def release(self) -> None:
-        "Close all connections in the pool."
+    def connection(self) -> _PoolConnectionContext:
+        "Acquires a connection from the pool, to be used in an `async with` statement."
 
-        return await self.pool.close()
+        return _PoolConnectionContext(self.pool)
 
+    async def select_concurrent(
+        self, *sql_generator_exprs: Union[Generator, Tuple[Generator, ...]]
+    ) -> List[List[Any]]:
+        """
+        Runs independent SELECT queries in parallel, each on a separate connection acquired from the pool.
 
-class SchemaConnection(asyncpg.Connection):
-    "An asyncpg connection that automatically establishes a default schema (search path)."
+        A single connection executes one query at a time; pass a tuple `(sql_generator_expr, *args)` for
+        queries that take parameters.
 
-    default_schema: ClassVar[str]
-    initialized: bool = False
+        Names in the expressions are resolved against the first stack frame outside this package, not the scope
+        in which each expression was written. Local variables of the caller are not visible to the query builder;
+        queries must be fully bound, with values that vary between calls passed as parameters (e.g. `p_1`).
+        """
 
-    def __init_subclass__(cls, /, default_schema, **kwargs):
-        super().__init_subclass__(**kwargs)
-        cls.default_schema = default_schema
-
-    async def _initialize(self) -> None:
-        if not self.initialized:
-            await super().execute(
-                f"SET SESSION search_path TO '{type(self).default_schema}'"
-            )
-            self.initialized = True
-
-    async def prepare(self, query, *, timeout=None, record_class=None):
-        await self._initialize()
-        return await super().prepare(query, timeout=timeout, record_class=record_class)
+        # build all queries up front, before awaiting changes the stack frames that names are resolved against
+        specs = []
+        for spec in sql_generator_exprs:
+            if isinstance(spec, tuple):
+                sql_generator_expr, *args = spec
+            else:
+                sql_generator_expr, args = spec, ()
+            specs.append((select(sql_generator_expr), args))
 
-    async def execute(self, query: str, *args, timeout: float = None) -> str:
-        await self._initialize()
-        logging.debug(query)
-        return await super().execute(query, *args, timeout=timeout)
+        return await asyncio.gather(
+            *(self._select_query(query, args) for query, args in specs)
+        )
 
-    async def executemany(self, command: str, args, *, timeout: float = None):
-        await self._initialize()
-        logging.debug(command)
-        return await super().executemany(command, args, timeout=timeout)
+    async def _select_query(self, query: Query, args: Iterable[Any]) -> List[Any]:
+        async with self.pool.acquire() as conn:
+            _log_query(query.sql)
+            records: List[asyncpg.Record] = await conn.fetch(query.sql, *args)
+            return DatabaseClient._unwrap_all(query.typ, records)
 
+    async def release(self) -> None:
+        "Close all connections in the pool."
 
-def _get_connection_type(params: ConnectionParameters) -> SchemaConnection:
-    class_name = f"Connection{hash(params)}"
-    class_type = type(class_name, (SchemaConnection,), {}, default_schema=params.schema)
-    return class_type
+        return await self.pool.close()
 
 
 async def _create_connection(params: ConnectionParameters) -> asyncpg.Connection:
-    return await asyncpg.connect(
-        connection_class=_get_connection_type(params), **params.as_kwargs()
-    )
+    return await asyncpg.connect(**params._kwargs)
 
 
 async def _create_pool(params: ConnectionParameters) -> asyncpg.Pool:
-    return await asyncpg.create_pool(
-        min_size=1,
-        max_size=8,
-        connection_class=_get_connection_type(params),
-        **params.as_kwargs(),
-    )
+    return await asyncpg.create_pool(**params._kwargs, **params._pool_kwargs)
 
 
 @asynccontextmanager
@@ -125,7 +153,62 @@ async def pool(
         pool.terminate()
 
 
+def _log_query(sql: str) -> None:
+    # skip message formatting when debug output is disabled
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug("executing query: %s", sql)
+
+
+def _insert_values(insert_obj: DataClass[T]) -> Tuple[Tuple[str, ...], List[Any]]:
+    "Column names and values to insert for an object, omitting columns whose value is to be assigned by the database."
+
+    plan = get_field_plan(type(insert_obj))
+    value_list = list(plan.values(insert_obj))
+    if not any(value is DEFAULT for value in value_list):
+        return plan.names, value_list
+
+    column_names = tuple(
+        name for name, value in zip(plan.names, value_list) if value is not DEFAULT
+    )
+    value_list = [value for value in value_list if value is not DEFAULT]
+    return column_names, value_list
+
+
+def _group_insert_values(
+    insert_objs: Iterable[DataClass[T]],
+) -> Dict[Tuple[type, Tuple[str, ...]], List[List[Any]]]:
+    "Groups the values of objects to insert by type and set of columns to populate."
+
+    batches: Dict[Tuple[type, Tuple[str, ...]], List[List[Any]]] = {}
+    for insert_obj in insert_objs:
+        if not is_dataclass_instance(insert_obj):
+            raise TypeError("object to insert must be a dataclass instance")
+
+        column_names, value_list = _insert_values(insert_obj)
+        batches.setdefault((type(insert_obj), column_names), []).append(value_list)
+    return batches
+
+
+@functools.lru_cache(maxsize=1024)
+def _insert_statement(cls: type, column_names: Tuple[str, ...]) -> str:
+    "An INSERT statement for a data class type."
+
+    table_name = get_table_name(cls)
+    columns = ", ".join(column_names)
+    placeholders = ", ".join(f"${index}" for index in range(1, len(column_names) + 1))
+    return f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+
+
+@functools.lru_cache(maxsize=1024)
+def _insert_or_ignore_statement(cls: type, column_names: Tuple[str, ...]) -> str:
+    "An INSERT statement for a data class type that skips rows violating a constraint."
+
+    return f"{_insert_statement(cls, column_names)} ON CONFLICT DO NOTHING"
+
+
 class DatabaseClient(BasicConnection):
+    __slots__ = ()
+
     conn: asyncpg.Connection
 
     def __init__(self, conn):
@@ -139,18 +222,19 @@ class DatabaseClient(BasicConnection):
             return None
 
         if target_type is None:
-            if len(record) > 1:
-                return tuple(record.values())
-            else:
+            # single-column results are the most common
+            if len(record) == 1:
                 return record[0]
+            else:
+                return tuple(record)
 
         elif is_dataclass_type(target_type):
             # initialize data class with parameters taken from query result
-            return target_type(*record.values())
+            return target_type(*record)
 
         elif target_type is list or target_type is set or target_type is tuple:
             # initialize collection class with iterator
-            return target_type(record.values())
+            return target_type(record)
 
         else:
             raise TypeError(f"unsupported target type {target_type}")
@@ -163,19 +247,18 @@ class DatabaseClient(BasicConnection):
             return []
 
         if target_type is None:
-            head = records[0]
-            if len(head) > 1:
-                return [tuple(record.values()) for record in records]
+            if len(records[0]) == 1:
+                return list(map(operator.itemgetter(0), records))
             else:
-                return [record[0] for record in records]
+                return list(map(tuple, records))
 
         elif is_dataclass_type(target_type):
             # initialize data class with parameters taken from query result
-            return [target_type(*record.values()) for record in records]
+            return list(itertools.starmap(target_type, records))
 
-        elif isinstance(target_type, (list, tuple, set)):
+        elif target_type is list or target_type is set or target_type is tuple:
             # initialize collection class with iterator
-            return [target_type(record.values()) for record in records]
+            return list(map(target_type, records))
 
         else:
             raise TypeError(f"unsupported target type {target_type}")
@@ -186,9 +269,8 @@ class DatabaseClient(BasicConnection):
         "Returns the first row of the resultset produced by a SELECT query."
 
         query = select(sql_generator_expr)
-        stmt = await self.conn.prepare(str(query))
-        logging.debug("executing query: %s", query)
-        record: asyncpg.Record = await stmt.fetchrow(*args)
+        _log_query(query.sql)
+        record: asyncpg.Record = await self.conn.fetchrow(query.sql, *args)
         return self._unwrap_one(query.typ, record)
 
     async def select(
@@ -197,11 +279,38 @@ class DatabaseClient(BasicConnection):
         "Returns all rows of the resultset produced by a SELECT query."
 
         query = select(sql_generator_expr)
-        stmt = await self.conn.prepare(str(query))
-        logging.debug("executing query: %s", query)
-        records: List[asyncpg.Record] = await stmt.fetch(*args)
+        _log_query(query.sql)
+        records: List[asyncpg.Record] = await self.conn.fetch(query.sql, *args)
         return self._unwrap_all(query.typ, records)
 
+    def select_iter(
+        self, sql_generator_expr: Generator[T, None, None], *args, prefetch: int = 1000
+    ) -> AsyncIterator[T]:
+        """
+        Iterates over the resultset produced by a SELECT query with a server-side cursor.
+
+        Rows are fetched in batches of `prefetch` so that large resultsets need not be held in memory all at once.
+        Cursors can only be used within a transaction, which the caller must start (and thereby own) such that the
+        cursor is closed when the transaction ends, even if iteration stops early.
+        """
+
+        if not self.conn.is_in_transaction():
+            raise RuntimeError("select_iter requires an active transaction")
+
+        query = select(sql_generator_expr)
+        _log_query(query.sql)
+        cursor = self.conn.cursor(query.sql, *args, prefetch=prefetch)
+        return self._unwrap_iter(query.typ, cursor)
+
+    @classmethod
+    async def _unwrap_iter(
+        cls, target_type: Type[T], records: AsyncIterator[asyncpg.Record]
+    ) -> AsyncIterator[T]:
+        "Converts records produced by a cursor into the expected type."
+
+        async for record in records:
+            yield cls._unwrap_one(target_type, record)
+
     async def insert_or_select(
         self,
         insert_obj: DataClass[T],
@@ -211,72 +320,158 @@ class DatabaseClient(BasicConnection):
         "Queries the database and inserts a new row if the query returns an empty resultset."
 
         query = insert_or_select(insert_obj, sql_generator_expr)
-        stmt = await self.conn.prepare(str(query))
-
-        # append parameters for SELECT part
-        fetch_args = list(args)
 
-        # append parameters for INSERT part
-        fields = dataclasses.fields(insert_obj)
-        for field in fields:
-            value = getattr(insert_obj, field.name)
-            if value is not DEFAULT:
-                fetch_args.append(value)
+        # parameters for SELECT part are followed by parameters for INSERT part
+        _, value_list = _insert_values(insert_obj)
 
-        logging.debug("executing query: %s", query)
-        record: asyncpg.Record = await stmt.fetchrow(*fetch_args)
+        _log_query(query.sql)
+        record: asyncpg.Record = await self.conn.fetchrow(query.sql, *args, *value_list)
         return self._unwrap_one(query.typ, record)
 
     async def insert_or_ignore(self, insert_obj: DataClass[T]) -> None:
 
         if not is_dataclass_instance(insert_obj):
-            raise TypeError(f"object to insert must be a dataclass instance")
-
-        table_name = type(insert_obj).__name__
-        fields = dataclasses.fields(insert_obj)
-
-        column_list = []
-        value_list = []
-        for field in fields:
-            value = getattr(insert_obj, field.name)
-            if value is not DEFAULT:
-                column_list.append(field.name)
-                value_list.append(value)
-
-        columns = ", ".join(column_list)
-        placeholders = ", ".join(
-            f"${index}" for index in range(1, len(column_list) + 1)
+            raise TypeError("object to insert must be a dataclass instance")
+
+        column_names, value_list = _insert_values(insert_obj)
+        query = _insert_or_ignore_statement(type(insert_obj), column_names)
+        _log_query(query)
+        await self.conn.execute(query, *value_list)
+
+    async def insert_many_or_ignore(
+        self,
+        insert_objs: Iterable[DataClass[T]],
+        *,
+        copy_threshold: int = _COPY_THRESHOLD,
+    ) -> None:
+        "Inserts several objects in batches, skipping those that would violate a constraint; large batches are streamed with COPY."
+
+        await self.bulk_insert(
+            insert_objs, ignore_conflicts=True, copy_threshold=copy_threshold
         )
 
-        query = f"""INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders}) ON CONFLICT DO NOTHING"""
-        logging.debug("executing query: %s", query)
-        stmt = await self.conn.prepare(query)
-        await stmt.executemany([value_list])
+    async def bulk_insert(
+        self,
+        insert_objs: Iterable[DataClass[T]],
+        *,
+        ignore_conflicts: bool = False,
+        copy_threshold: int = _COPY_THRESHOLD,
+    ) -> None:
+        """
+        Inserts a large number of objects with the PostgreSQL COPY protocol.
+
+        :param ignore_conflicts: Skip rows that would violate a constraint (by copying into a temporary table first).
+        :param copy_threshold: Batches with fewer rows (1000 by default) are sent with INSERT statements since COPY
+            has a setup cost.
+        """
+
+        batches = _group_insert_values(insert_objs)
+        for (cls, column_names), value_lists in batches.items():
+            if len(value_lists) < copy_threshold:
+                if ignore_conflicts:
+                    query = _insert_or_ignore_statement(cls, column_names)
+                else:
+                    query = _insert_statement(cls, column_names)
+                _log_query(query)
+                await self.conn.executemany(query, value_lists)
+
+            elif ignore_conflicts:
+                table_name = get_table_name(cls)
+                temp_name = quote_identifier(_BULK_INSERT_TABLE)
+                columns = ", ".join(column_names)
+
+                # the temporary table is dropped explicitly (rather than on commit) such that it is also removed when
+                # the transaction below is a savepoint nested in an outer transaction
+                async with self.conn.transaction():
+                    await self.conn.execute(
+                        f"CREATE TEMPORARY TABLE {temp_name} AS SELECT {columns} FROM {table_name} WITH NO DATA"
+                    )
+                    await self.conn.copy_records_to_table(
+                        _BULK_INSERT_TABLE, records=value_lists, columns=column_names
+                    )
+                    await self.conn.execute(
+                        f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {temp_name} ON CONFLICT DO NOTHING"
+                    )
+                    await self.conn.execute(f"DROP TABLE {temp_name}")
+
+            else:
+                # COPY quotes the table name itself
+                await self.conn.copy_records_to_table(
+                    get_table_identifier(cls), records=value_lists, columns=column_names
+                )
 
 
 class DatabaseTransaction(DatabaseClient):
+    __slots__ = ("transaction",)
+
     def __init__(self, conn, transaction):
         super().__init__(conn)
         self.transaction = transaction
 
 
-class DatabaseConnection(DatabaseClient):
-    def __init__(self, conn):
-        super().__init__(conn)
+class _TransactionContext:
+    "Starts a transaction on entry, and commits or rolls back the transaction on exit."
 
-    @asynccontextmanager
-    async def transaction(self) -> AsyncIterator[DatabaseTransaction]:
-        transaction = self.conn.transaction()
-        await transaction.start()
-        try:
-            yield DatabaseTransaction(self.conn, transaction)
-        except:
+    __slots__ = ("conn", "options", "transaction")
+
+    conn: asyncpg.Connection
+    options: Dict[str, Any]
+    transaction: Optional[asyncpg.transaction.Transaction]
+
+    def __init__(self, conn: asyncpg.Connection, **options):
+        self.conn = conn
+        self.options = options
+        self.transaction = None
+
+    async def __aenter__(self) -> DatabaseTransaction:
+        self.transaction = self.conn.transaction(**self.options)
+        await self.transaction.start()
+        return DatabaseTransaction(self.conn, self.transaction)
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        transaction, self.transaction = self.transaction, None
+        if exc_type is not None:
             await transaction.rollback()
-            raise
         else:
             await transaction.commit()
 
 
+class DatabaseConnection(DatabaseClient):
+    __slots__ = ()
+
+    def __init__(self, conn):
+        super().__init__(conn)
+
+    def transaction(
+        self,
+        *,
+        isolation: Optional[str] = None,
+        readonly: bool = False,
+        deferrable: bool = False,
+    ) -> _TransactionContext:
+        """
+        Starts a transaction, to be used in an `async with` statement.
+
+        :param isolation: Transaction isolation mode, e.g. "serializable", "repeatable_read" or "read_committed".
+        :param readonly: True if the transaction does not modify the database.
+        :param deferrable: True if a serializable read-only transaction may wait to run without risk of failure.
+        """
+
+        return _TransactionContext(
+            self.conn, isolation=isolation, readonly=readonly, deferrable=deferrable
+        )
+
+    def read_transaction(self) -> _TransactionContext:
+        """
+        Starts a read-only transaction, to be used in an `async with` statement.
+
+        Grouping several SELECT queries in a single read-only transaction saves round-trips and lets the server skip
+        transaction ID assignment.
+        """
+
+        return _TransactionContext(self.conn, readonly=True)
+
+
 @asynccontextmanager
 async def connection(
     params: ConnectionParameters = None,
@@ -291,6 +486,10 @@ async def connection(
 
 
 _shared_pool = ContextVar("shared_pool", default={})
+# locks that serialize creating shared pools, kept for the lifetime of the event loop they are bound to
+_shared_pool_locks: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, Dict[ConnectionParameters, asyncio.Lock]
+] = weakref.WeakKeyDictionary()
 
 
 def _get_shared_pool() -> Dict[ConnectionParameters, DatabasePool]:
@@ -311,6 +510,8 @@ def _get_shared_pool() -> Dict[ConnectionParameters, DatabasePool]:
 
 
 class SharedDatabasePool(DatabasePool):
+    __slots__ = ("params",)
+
     params: ConnectionParameters
 
     def __init__(self, pool: DatabasePool, params: ConnectionParameters):
@@ -318,14 +519,22 @@ class SharedDatabasePool(DatabasePool):
         self.params = params
         _get_shared_pool()[params] = self
 
-    def __del__(self):
-        _get_shared_pool().pop(self.params, None)
-
     @classmethod
     async def get_or_create(cls, params: ConnectionParameters) -> SharedDatabasePool:
-        pool = _get_shared_pool().get(params, None)
-        if pool is None:
-            pool = SharedDatabasePool(await _create_pool(params), params)
+        # parameters cache their hash, and dictionary lookup tests identity before equality, so passing the same
+        # parameters object (e.g. one pinned by DataAccess) costs a single probe without comparing fields
+        pools = _get_shared_pool()
+        pool = pools.get(params, None)
+        if pool is not None:
+            return pool
+
+        # serialize pool creation such that coroutines requesting the same pool concurrently don't create several
+        locks = _shared_pool_locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.setdefault(params, asyncio.Lock())
+        async with lock:
+            pool = pools.get(params, None)
+            if pool is None:
+                pool = SharedDatabasePool(await _create_pool(params), params)
         return pool
 
     async def release(self) -> None:
@@ -343,6 +552,8 @@ async def shared_pool(params: ConnectionParameters = None) -> DatabasePool:
 
 
 class DataAccess:
+    __slots__ = ("params",)
+
     params: ConnectionParameters
 
     def __init__(self, params: ConnectionParameters = None):
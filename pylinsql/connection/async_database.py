@@ -5,15 +5,23 @@ SQL database connection handling with the async/await syntax.
 from __future__ import annotations
 
 import dataclasses
+import functools
+import operator
 import os
+import types
 from contextlib import asynccontextmanager
 from typing import (
+    TYPE_CHECKING,
     Any,
     AsyncIterator,
+    Callable,
     Dict,
     Iterable,
     List,
+    Mapping,
     Optional,
+    Sequence,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -22,16 +30,12 @@ from typing import (
 import asyncpg
 from strong_typing.inspection import is_dataclass_type
 
-T = TypeVar("T")
-
+from ..query.base import cast_if_not_none, get_field_plan, quote_identifier
 
-def cast_if_not_none(typ: Type[T], value: Optional[Any]) -> Optional[T]:
-    "Coerces an optional value into the specified type unless the value is None."
+if TYPE_CHECKING:
+    import numpy
 
-    if value is None:
-        return None
-    else:
-        return typ(value)
+T = TypeVar("T")
 
 
 @dataclasses.dataclass(eq=True, frozen=True)
@@ -54,21 +58,124 @@ class ConnectionParameters:
         default_factory=lambda: int(os.getenv("PSQL_PORT", "5432"))
     )
     command_timeout: int = 60
+    # number of statements asyncpg keeps prepared per connection, 0 disables the cache (e.g. behind pgbouncer)
+    statement_cache_size: int = dataclasses.field(
+        default_factory=lambda: int(os.getenv("PSQL_STATEMENT_CACHE_SIZE", "100"))
+    )
     schema: str = dataclasses.field(
         default_factory=lambda: os.getenv("PSQL_SCHEMA", "public")
     )
+    # seconds after which a statement not used is evicted from the statement cache, 0 keeps statements indefinitely
+    max_cached_statement_lifetime: int = 300
+
+    # connection pool sizing
+    pool_min_size: int = dataclasses.field(
+        default_factory=lambda: int(os.getenv("PSQL_POOL_MIN", "1"))
+    )
+    pool_max_size: int = dataclasses.field(
+        default_factory=lambda: int(os.getenv("PSQL_POOL_MAX", "8"))
+    )
+    pool_max_queries: int = 50000
+    pool_max_inactive_connection_lifetime: float = dataclasses.field(
+        default_factory=lambda: float(os.getenv("PSQL_POOL_IDLE", "300"))
+    )
+
+    def __hash__(self) -> int:
+        # parameters are immutable, compute hash only once
+        try:
+            return self.__dict__["_hash"]
+        except KeyError:
+            h = hash(get_field_plan(type(self)).values(self))
+            object.__setattr__(self, "_hash", h)
+            return h
+
+    @functools.cached_property
+    def _kwargs(self) -> Dict[str, Any]:
+        # shared by all connections made with these parameters, must not be mutated
+        return {
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+            "host": self.host,
+            "port": self.port,
+            "command_timeout": self.command_timeout,
+            "statement_cache_size": self.statement_cache_size,
+            "max_cached_statement_lifetime": self.max_cached_statement_lifetime,
+            # sent with the startup message, avoids a SET round-trip on each new connection; the schema name is
+            # quoted such that the server does not fold it to lowercase
+            "server_settings": {"search_path": quote_identifier(self.schema)},
+        }
+
+    @functools.cached_property
+    def _pool_kwargs(self) -> Dict[str, Union[int, float]]:
+        # pool options passed in addition to connection options
+        return {
+            "min_size": self.pool_min_size,
+            "max_size": self.pool_max_size,
+            "max_queries": self.pool_max_queries,
+            "max_inactive_connection_lifetime": self.pool_max_inactive_connection_lifetime,
+        }
+
+    def as_kwargs(self) -> Mapping[str, Any]:
+        "Connection string parameters as keyword arguments (a read-only view)."
+
+        return types.MappingProxyType(self._kwargs)
+
+
+def _missing_column(key: str) -> None:
+    raise RuntimeError(
+        f"object field {key} without default value is missing a corresponding database record column"
+    )
 
-    def as_kwargs(self) -> Dict[str, Union[str, int]]:
-        "Connection string parameters as keyword arguments."
 
-        d = dataclasses.asdict(self)
-        del d["schema"]
-        return d
+@functools.lru_cache(maxsize=None)
+def _record_factory(
+    typ: type, columns: Tuple[str, ...]
+) -> Callable[[Sequence[Any]], Any]:
+    "Generates a function that maps a record (indexed by column position) to a data class instance."
+
+    index = {column: i for i, column in enumerate(columns)}
+    defaults = {}
+    factories = {}
+    lines = ["def make(values):", "    obj = __new__(T)"]
+    for field in get_field_plan(typ).fields:
+        key = field.name
+        i = index.get(key)
+        if field.default is not dataclasses.MISSING:
+            defaults[key] = field.default
+            fallback = f"obj.{key} = __defaults[{key!r}]"
+        elif field.default_factory is not dataclasses.MISSING:
+            factories[key] = field.default_factory
+            fallback = f"obj.{key} = __factories[{key!r}]()"
+        else:
+            fallback = f"__missing({key!r})"
+
+        if i is None:
+            lines.append(f"    {fallback}")
+        else:
+            lines.append(f"    value = values[{i}]")
+            lines.append("    if value is not None:")
+            lines.append(f"        obj.{key} = value")
+            lines.append("    else:")
+            lines.append(f"        {fallback}")
+    lines.append("    return obj")
+
+    namespace = {
+        "T": typ,
+        "__new__": object.__new__,
+        "__defaults": defaults,
+        "__factories": factories,
+        "__missing": _missing_column,
+    }
+    exec("\n".join(lines), namespace)
+    return namespace["make"]
 
 
 class BasicConnection:
     "An extension of asyncpg connection class with auxiliary methods."
 
+    __slots__ = ("conn",)
+
     conn: asyncpg.Connection
 
     def __init__(self, conn: asyncpg.Connection):
@@ -83,13 +190,56 @@ class BasicConnection:
         records = await self.conn.fetch(query, *args)
         return self._typed_fetch(typ, records)
 
+    async def typed_fetchmany(
+        self, typ: Type[T], query: str, args: Iterable[Iterable[Any]]
+    ) -> List[T]:
+        """Runs a query once for each set of arguments in a single round-trip, and maps all rows to a Python data class."""
+
+        if not is_dataclass_type(typ):
+            raise TypeError(f"{typ} must be a dataclass type")
+
+        records = await self.conn.fetchmany(query, args)
+        return self._typed_fetch(typ, records)
+
+    async def typed_fetchmany_column(
+        self, typ: Type[T], query: str, args: Iterable[Iterable[Any]], column: int = 0
+    ) -> List[T]:
+        """Runs a query once for each set of arguments in a single round-trip, and maps a single column to a Python class."""
+
+        records = await self.conn.fetchmany(query, args)
+        # cast inlined, this runs once per row
+        return [
+            None if value is None else typ(value)
+            for value in map(operator.itemgetter(column), records)
+        ]
+
     async def typed_fetch_column(
         self, typ: Type[T], query: str, *args, column: int = 0
     ) -> List[T]:
         """Maps a single column of a database record to a Python class."""
 
         records = await self.conn.fetch(query, *args)
-        return [cast_if_not_none(typ, record[column]) for record in records]
+        # cast inlined, this runs once per row
+        return [
+            None if value is None else typ(value)
+            for value in map(operator.itemgetter(column), records)
+        ]
+
+    async def typed_fetch_column_array(
+        self, dtype: Any, query: str, *args, column: int = 0
+    ) -> "numpy.ndarray":
+        """
+        Maps a single numeric column of a database record to a NumPy array.
+
+        Requires the optional dependency `numpy`. The column must not contain NULL values.
+        """
+
+        import numpy as np
+
+        records = await self.conn.fetch(query, *args)
+        return np.fromiter(
+            (record[column] for record in records), dtype=dtype, count=len(records)
+        )
 
     async def typed_fetch_value(
         self, typ: Type[T], query: str, *args, column: int = 0
@@ -98,26 +248,19 @@ class BasicConnection:
         return cast_if_not_none(typ, value)
 
     def _typed_fetch(self, typ: Type[T], records: List[asyncpg.Record]) -> List[T]:
+        if not records:
+            return []
+
+        if is_dataclass_type(typ):
+            make = _record_factory(typ, tuple(records[0].keys()))
+            # records support positional indexing, no need to copy values into a tuple
+            return list(map(make, records))
+
         results = []
         for record in records:
             result = object.__new__(typ)
-
-            if is_dataclass_type(typ):
-                for field in dataclasses.fields(typ):
-                    key = field.name
-                    value = record.get(key, None)
-                    if value is not None:
-                        setattr(result, key, value)
-                    elif field.default:
-                        setattr(result, key, field.default)
-                    else:
-                        raise RuntimeError(
-                            f"object field {key} without default value is missing a corresponding database record column"
-                        )
-            else:
-                for key, value in record.items():
-                    setattr(result, key, value)
-
+            for key, value in record.items():
+                setattr(result, key, value)
             results.append(result)
         return results
 
@@ -146,7 +289,7 @@ class BasicConnection:
 
 
 async def _create_connection(params: ConnectionParameters) -> asyncpg.Connection:
-    return await asyncpg.connect(**params.as_kwargs())
+    return await asyncpg.connect(**params._kwargs)
 
 
 @asynccontextmanager
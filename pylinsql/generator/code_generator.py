@@ -52,6 +52,8 @@ class TableSchema:
 class CatalogSchema:
     "Metadata associated with a database (a.k.a. catalog)."
 
+    __slots__ = ("name", "tables")
+
     name: str
     tables: Dict[str, TableSchema]
 
@@ -61,6 +63,8 @@ class CatalogSchema:
 
 @dataclass
 class _UniqueConstraint:
+    __slots__ = ("key_name", "key_schema", "key_table", "key_column")
+
     key_name: str
     key_schema: str
     key_table: str
@@ -69,6 +73,16 @@ class _UniqueConstraint:
 
 @dataclass
 class _ReferenceConstraint:
+    __slots__ = (
+        "foreign_key_name",
+        "foreign_key_schema",
+        "foreign_key_table",
+        "foreign_key_column",
+        "primary_key_schema",
+        "primary_key_table",
+        "primary_key_column",
+    )
+
     foreign_key_name: str
     foreign_key_schema: str
     foreign_key_table: str
@@ -196,31 +210,37 @@ class _CatalogSchemaBuilder:
                 MIN(depth), child_name
         """
         tables = await self.conn.typed_fetch_column(str, query, self.db_schema)
-        table_schemas = [await self._get_table_schema(table) for table in tables]
-        table_schema_map = dict((table.name, table) for table in table_schemas)
+        table_schemas = await self._get_table_schemas(tables)
+        table_schema_map = {table.name: table for table in table_schemas}
         return CatalogSchema(name=self.db_schema, tables=table_schema_map)
 
-    async def _get_table_schema(self, db_table: str) -> TableSchema:
-        "Retrieves metadata for a table in the current catalog."
+    async def _get_table_schemas(self, db_tables: List[str]) -> List[TableSchema]:
+        """
+        Retrieves metadata for tables in the current catalog.
+
+        Metadata is fetched for all tables in the schema at once (rather than table by table) to save round-trips.
+        """
 
         query = """
             SELECT
+                cls.relname AS table_name,
                 dsc.description
             FROM
                 pg_catalog.pg_class cls
                     INNER JOIN pg_catalog.pg_namespace ns ON cls.relnamespace = ns.oid
                     INNER JOIN pg_catalog.pg_description dsc ON cls.oid = dsc.objoid
             WHERE
-                ns.nspname = $1 AND cls.relname = $2 AND dsc.objsubid = 0
+                ns.nspname = $1 AND dsc.objsubid = 0
         """
-        description = await self.conn.typed_fetch_value(
-            str, query, self.db_schema, db_table
-        )
+        descriptions: Dict[str, str] = {}
+        for record in await self.conn.raw_fetch(query, self.db_schema):
+            descriptions.setdefault(record["table_name"], record["description"])
 
         query = """
             WITH
                 column_description AS (
                     SELECT
+                        cls.relname,
                         dsc.objsubid,
                         dsc.description
                     FROM
@@ -228,9 +248,10 @@ class _CatalogSchemaBuilder:
                             INNER JOIN pg_catalog.pg_namespace ns ON cls.relnamespace = ns.oid
                             INNER JOIN pg_catalog.pg_description dsc ON cls.oid = dsc.objoid
                     WHERE
-                        ns.nspname = $1 AND cls.relname = $2
+                        ns.nspname = $1
                 )
             SELECT
+                table_name,
                 column_name,
                 CASE
                     WHEN is_nullable = 'YES' THEN TRUE
@@ -248,13 +269,86 @@ class _CatalogSchemaBuilder:
                 description
             FROM
                 information_schema.columns cols
-                    LEFT JOIN column_description ON cols.ordinal_position = objsubid
+                    LEFT JOIN column_description ON cols.table_name = relname AND cols.ordinal_position = objsubid
             WHERE
-                table_catalog = CURRENT_CATALOG AND table_schema = $1 AND table_name = $2
+                table_catalog = CURRENT_CATALOG AND table_schema = $1
             ORDER BY
-                ordinal_position
+                table_name, ordinal_position
+        """
+        columns: Dict[str, List[Any]] = {}
+        for record in await self.conn.raw_fetch(query, self.db_schema):
+            columns.setdefault(record["table_name"], []).append(record)
+
+        query = """
+            SELECT
+                ukey.constraint_name AS key_name,
+                ukey.table_schema AS key_schema,
+                ukey.table_name AS key_table,
+                ukey.column_name AS key_column
+
+            FROM
+                information_schema.table_constraints tab_con
+                    INNER JOIN information_schema.key_column_usage ukey ON
+                        tab_con.constraint_catalog = ukey.constraint_catalog AND
+                        tab_con.constraint_schema = ukey.constraint_schema AND
+                        tab_con.constraint_name = ukey.constraint_name
+                        
+            WHERE ukey.table_catalog = CURRENT_CATALOG
+                AND ukey.table_schema = $1
+                AND tab_con.constraint_type = 'PRIMARY KEY'
         """
-        columns = await self.conn.raw_fetch(query, self.db_schema, db_table)
+        unique_constraints: Dict[str, List[_UniqueConstraint]] = {}
+        for constraint in await self.conn.typed_fetch(
+            _UniqueConstraint, query, self.db_schema
+        ):
+            unique_constraints.setdefault(constraint.key_table, []).append(constraint)
+
+        query = """
+            SELECT
+                foreign_constraint_name AS foreign_key_name,
+                foreign_table_schema AS foreign_key_schema,
+                foreign_table_name AS foreign_key_table,
+                foreign_column_name AS foreign_key_column,
+                primary_constraint_name AS primary_key_name,
+                primary_table_schema AS primary_key_schema,
+                primary_table_name AS primary_key_table,
+                primary_column_name AS primary_key_column
+            FROM
+                key_reference
+            WHERE
+                foreign_table_catalog = CURRENT_CATALOG
+                    AND foreign_table_schema = $1
+        """
+        reference_constraints: Dict[str, List[_ReferenceConstraint]] = {}
+        for constraint in await self.conn.typed_fetch(
+            _ReferenceConstraint, query, self.db_schema
+        ):
+            reference_constraints.setdefault(constraint.foreign_key_table, []).append(
+                constraint
+            )
+
+        table_schemas = []
+        for db_table in db_tables:
+            column_schemas = self._get_column_schemas(
+                db_table, columns.get(db_table, [])
+            )
+            table_schema = TableSchema(
+                name=db_table,
+                description=descriptions.get(db_table),
+                columns=column_schemas,
+            )
+            self._set_foreign_keys(
+                table_schema, reference_constraints.get(db_table, [])
+            )
+            self._set_unique_keys(table_schema, unique_constraints.get(db_table, []))
+            table_schemas.append(table_schema)
+        return table_schemas
+
+    def _get_column_schemas(
+        self, db_table: str, columns: List[Any]
+    ) -> Dict[str, ColumnSchema]:
+        "Maps column metadata records of a table to column schema objects."
+
         column_schemas = {}
         for column in columns:
             column_type = column["data_type"]
@@ -265,13 +359,14 @@ class _CatalogSchemaBuilder:
                     f"unrecognized database column type {column_type} in table {db_table}"
                 )
 
-            if column["is_nullable"] and column["column_default"] is None:
+            column_default = column["column_default"]
+            if column["is_nullable"] and column_default is None:
                 outer_type = Optional[value_type]
             else:
                 outer_type = value_type
 
             try:
-                default = cast_if_not_none(value_type, column["column_default"])
+                default = cast_if_not_none(value_type, column_default)
             except:
                 # a field may have an expression default value such as nextval(...)
                 default = None
@@ -283,37 +378,11 @@ class _CatalogSchemaBuilder:
                 description=column["description"],
             )
             column_schemas[column_schema.name] = column_schema
+        return column_schemas
 
-        table_schema = TableSchema(
-            name=db_table, description=description, columns=column_schemas
-        )
-        await self._set_foreign_keys(table_schema)
-        await self._set_unique_keys(table_schema)
-        return table_schema
-
-    async def _set_unique_keys(self, table_schema: TableSchema) -> None:
-        query = """
-            SELECT
-                ukey.constraint_name AS key_name,
-                ukey.table_schema AS key_schema,
-                ukey.table_name AS key_table,
-                ukey.column_name AS key_column
-
-            FROM
-                information_schema.table_constraints tab_con
-                    INNER JOIN information_schema.key_column_usage ukey ON
-                        tab_con.constraint_catalog = ukey.constraint_catalog AND
-                        tab_con.constraint_schema = ukey.constraint_schema AND
-                        tab_con.constraint_name = ukey.constraint_name
-                        
-            WHERE ukey.table_catalog = CURRENT_CATALOG
-                AND ukey.table_schema = $1
-                AND ukey.table_name = $2
-                AND tab_con.constraint_type = 'PRIMARY KEY'
-        """
-        constraints = await self.conn.typed_fetch(
-            _UniqueConstraint, query, self.db_schema, table_schema.name
-        )
+    def _set_unique_keys(
+        self, table_schema: TableSchema, constraints: List[_UniqueConstraint]
+    ) -> None:
         if len(constraints) > 1:
             table_schema.primary_key = PrimaryKey(
                 constraints[0].key_name,
@@ -326,29 +395,11 @@ class _CatalogSchemaBuilder:
         else:
             table_schema.primary_key = None
 
-    async def _set_foreign_keys(self, table_schema: TableSchema) -> None:
+    def _set_foreign_keys(
+        self, table_schema: TableSchema, constraints: List[_ReferenceConstraint]
+    ) -> None:
         "Binds table relations associating foreign keys with primary keys."
 
-        query = """
-            SELECT
-                foreign_constraint_name AS foreign_key_name,
-                foreign_table_schema AS foreign_key_schema,
-                foreign_table_name AS foreign_key_table,
-                foreign_column_name AS foreign_key_column,
-                primary_constraint_name AS primary_key_name,
-                primary_table_schema AS primary_key_schema,
-                primary_table_name AS primary_key_table,
-                primary_column_name AS primary_key_column
-            FROM
-                key_reference
-            WHERE
-                foreign_table_catalog = CURRENT_CATALOG
-                    AND foreign_table_schema = $1
-                    AND foreign_table_name = $2
-        """
-        constraints = await self.conn.typed_fetch(
-            _ReferenceConstraint, query, self.db_schema, table_schema.name
-        )
         for constraint in constraints:
             if constraint.foreign_key_schema != constraint.primary_key_schema:
                 raise RuntimeError(
@@ -482,6 +533,9 @@ def _wrap_print(str, file: TextIO) -> None:
         print(line, file=file)
 
 
+_dunder_re = re.compile(r"^__.+__$")
+
+
 def dataclass_to_stream(typ: Type[DataClass], target: TextIO) -> None:
     "Generates Python code corresponding to a dataclass type."
 
@@ -515,11 +569,12 @@ def dataclass_to_stream(typ: Type[DataClass], target: TextIO) -> None:
         print(file=target)
 
     # class variables (e.g. "primary_key")
-    field_names = [field.name for field in dataclasses.fields(typ)]
+    fields = dataclasses.fields(typ)
+    field_names = set(field.name for field in fields)
     variables = {
         name: value
         for name, value in inspect.getmembers(typ, lambda m: not inspect.isroutine(m))
-        if not re.match(r"^__.+__$", name) and name not in field_names
+        if not _dunder_re.match(name) and name not in field_names
     }
     if variables:
         for name, value in variables.items():
@@ -527,18 +582,19 @@ def dataclass_to_stream(typ: Type[DataClass], target: TextIO) -> None:
         print(file=target)
 
     # table columns
-    for field in dataclasses.fields(typ):
+    for field in fields:
         type_name = python_type_to_str(field.type)
-        metadata = dict(field.metadata)
-        metadata.pop("description", None)
 
         field_initializer: Dict[str, str] = {}
         if field.default is not MISSING:
             field_initializer["default"] = repr(field.default)
         if field.default_factory is not MISSING:
             field_initializer["default_factory"] = field.default_factory.__name__
-        if metadata:
-            field_initializer["metadata"] = repr(metadata)
+        if field.metadata:
+            metadata = dict(field.metadata)
+            metadata.pop("description", None)
+            if metadata:
+                field_initializer["metadata"] = repr(metadata)
 
         if not field_initializer:
             initializer = ""
@@ -1,5 +1,6 @@
 import datetime
 import decimal
+import functools
 import logging
 import re
 import typing
@@ -160,6 +161,41 @@ class SqlTimeType(SqlDataType):
             return "time"
 
 
+# PostgreSQL types without parameters
+_sql_to_python_types = {
+    "boolean": bool,
+    "smallint": int16,
+    "int": int32,
+    "integer": int32,
+    "bigint": int64,
+    "real": Annotated[float, Storage(4)],
+    "double": Annotated[float, Storage(8)],
+    "double precision": Annotated[float, Storage(8)],
+    "character varying": str,
+    "text": str,
+    "decimal": decimal.Decimal,
+    "numeric": decimal.Decimal,
+    "date": datetime.date,
+    "time": datetime.time,
+    "time with time zone": datetime.time,
+    "time without time zone": datetime.time,
+    "interval": datetime.timedelta,
+    "timestamp": datetime.datetime,
+    "timestamp with time zone": datetime.datetime,
+    "timestamp without time zone": datetime.datetime,
+    "json": str,
+    "jsonb": str,
+    "uuid": uuid.UUID,
+}
+
+# PostgreSQL types with parameters
+_character_varying_re = re.compile(r"^character varying[(](\d+)[)]$")
+_decimal_re = re.compile(r"^(?:decimal|numeric)[(](\d+)(?:,\s*(\d+))?[)]$")
+_time_re = re.compile(r"^time[(](\d+)[)](?: with(?:out)? time zone)?$")
+_timestamp_re = re.compile(r"^timestamp[(](\d+)[)](?: with(?:out)? time zone)?$")
+
+
+@functools.lru_cache(maxsize=None)
 def sql_to_python_type(sql_type: str) -> type:
     "Maps a PostgreSQL type to a native Python type."
 
@@ -168,56 +204,27 @@ def sql_to_python_type(sql_type: str) -> type:
 
     sql_type = sql_type.lower()
 
-    if sql_type == "boolean":
-        return bool
-    if sql_type == "smallint":
-        return int16
-    if sql_type in ["int", "integer"]:
-        return int32
-    if sql_type == "bigint":
-        return int64
-    if sql_type == "real":
-        return Annotated[float, Storage(4)]
-    if sql_type in ["double", "double precision"]:
-        return Annotated[float, Storage(8)]
-    if sql_type in ["character varying", "text"]:
-        return str
-    if sql_type in ["decimal", "numeric"]:
-        return decimal.Decimal
-    if sql_type == "date":
-        return datetime.date
-    if sql_type in ["time", "time with time zone", "time without time zone"]:
-        return datetime.time
-    if sql_type == "interval":
-        return datetime.timedelta
-    if sql_type in [
-        "timestamp",
-        "timestamp with time zone",
-        "timestamp without time zone",
-    ]:
-        return datetime.datetime
-    if sql_type in ["json", "jsonb"]:
-        return str
-    if sql_type == "uuid":
-        return uuid.UUID
-
-    m = re.match(r"^character varying[(](\d+)[)]$", sql_type)
+    typ = _sql_to_python_types.get(sql_type)
+    if typ is not None:
+        return typ
+
+    m = _character_varying_re.match(sql_type)
     if m is not None:
         len = int(m.group(1))
         return Annotated[str, MaxLength(len)]
 
-    m = re.match(r"^(?:decimal|numeric)[(](\d+)(?:,\s*(\d+))?[)]$", sql_type)
+    m = _decimal_re.match(sql_type)
     if m is not None:
         precision = int(m.group(1))
         scale = int(m.group(2)) if m.group(2) else 0
         return Annotated[decimal.Decimal, Precision(precision, scale)]
 
-    m = re.match(r"^time[(](\d+)[)](?: with(?:out)? time zone)?$", sql_type)
+    m = _time_re.match(sql_type)
     if m is not None:
         precision = int(m.group(1))
         return Annotated[datetime.time, TimePrecision(precision)]
 
-    m = re.match(r"^timestamp[(](\d+)[)](?: with(?:out)? time zone)?$", sql_type)
+    m = _timestamp_re.match(sql_type)
     if m is not None:
         precision = int(m.group(1))
         return Annotated[datetime.datetime, TimePrecision(precision)]
@@ -25,8 +25,11 @@ from strong_typing.inspection import (
 )
 
 
+_dbml_identifier_re = re.compile(r"^[A-Za-z_]+(?:[(][A-Za-z0-9_]+[)])?$")
+
+
 def dbml_identifier(text: str) -> str:
-    if re.match(r"^[A-Za-z_]+(?:[(][A-Za-z0-9_]+[)])?$", text):
+    if _dbml_identifier_re.match(text):
         # examples: bigint, varchar(255)
         return text
     else:
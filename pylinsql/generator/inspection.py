@@ -14,6 +14,9 @@ from strong_typing.inspection import is_dataclass_type, is_type_enum
 from .schema import DiscriminatedKey, ForeignKey, Reference
 
 
+_class_definition_re = re.compile(r"^class ([A-Za-z_][A-Za-z0-9_]*)")
+
+
 def _classes_in_source(module: types.ModuleType) -> Dict[str, int]:
     "Retrieve a dictionary of key/value pairs mapping class names in a module to source code line numbers."
 
@@ -30,7 +33,7 @@ def _classes_in_source(module: types.ModuleType) -> Dict[str, int]:
 
     result: Dict[str, int] = {}
     for lineno, line in enumerate(lines, start=1):
-        m = re.match(r"^class ([A-Za-z_][A-Za-z0-9_]*)", line)
+        m = _class_definition_re.match(line)
         if m:
             result[m.group(1)] = lineno
 
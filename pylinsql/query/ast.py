@@ -6,10 +6,22 @@ This module is used internally.
 
 from __future__ import annotations
 
+import functools
 import inspect
+import types
 from dataclasses import dataclass, field
-import itertools
-from typing import Any, Callable, ClassVar, Dict, List, Optional
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from .core import *
 
@@ -17,9 +29,118 @@ from .core import *
 class Expression:
     "An abstract syntax node synthesized from a Python Boolean lambda expression or the conditional part of a generator expression."
 
-    def __str__(self):
+    @classmethod
+    def intern(cls, *args) -> Expression:
+        """
+        Returns a shared instance for nodes that are structurally equal.
+
+        Nodes whose arguments are not hashable (e.g. those that hold a list) are not interned, and a new instance is
+        returned instead.
+        """
+
+        try:
+            return _intern(cls, *args)
+        except TypeError:
+            return cls(*args)
+
+    def fragments(self) -> Sequence[Fragment]:
+        "The string representation of this node as a sequence of strings and child nodes to be rendered in turn."
+
         raise NotImplementedError("abstract node")
 
+    def render(self, out: List[str]) -> None:
+        "Appends the string representation of this node to a list of string fragments."
+
+        # walk the tree with an explicit stack to avoid a Python call frame per node
+        stack: List[Fragment] = [self]
+        while stack:
+            item = stack.pop()
+            if type(item) is str:
+                out.append(item)
+            else:
+                stack.extend(reversed(item.fragments()))
+
+    def __str__(self):
+        out: List[str] = []
+        self.render(out)
+        return "".join(out)
+
+
+Fragment = Union[str, Expression]
+
+_COMMA = ", "
+_AND = " and "
+_OR = " or "
+
+
+def _join_fragments(
+    start: str, separator: str, exprs: Sequence[Expression], end: str
+) -> List[Fragment]:
+    out: List[Fragment] = [start]
+    for index, expr in enumerate(exprs):
+        if index:
+            out.append(separator)
+        out.append(expr)
+    out.append(end)
+    return out
+
+
+# signatures of SQL function stubs never change, inspect each only once
+_signature = functools.lru_cache(maxsize=None)(inspect.signature)
+
+
+@dataclass(frozen=True)
+class _Arity:
+    "Number of positional arguments a function accepts."
+
+    min_count: int
+    max_count: Optional[int]
+
+    def accepts(self, count: int) -> bool:
+        if count < self.min_count:
+            return False
+        return self.max_count is None or count <= self.max_count
+
+
+@functools.lru_cache(maxsize=None)
+def _positional_arity(fn: Callable) -> Optional[_Arity]:
+    "Positional arity of a function, or None if the function has required keyword-only parameters."
+
+    code = fn.__code__
+    kwdefaults = fn.__kwdefaults__ or {}
+    if code.co_kwonlyargcount > len(kwdefaults):
+        return None
+
+    max_count = code.co_argcount
+    min_count = max_count - len(fn.__defaults__ or ())
+    if code.co_flags & inspect.CO_VARARGS:
+        return _Arity(min_count, None)
+    else:
+        return _Arity(min_count, max_count)
+
+
+@functools.lru_cache(maxsize=8192, typed=True)
+def _intern(cls: type, *args) -> Expression:
+    return cls(*args)
+
+
+def _constant_key(value: Any) -> Any:
+    "A key that tells apart values that compare equal but have a different representation (e.g. 1 and True)."
+
+    typ = type(value)
+    if typ is tuple:
+        return typ, tuple(_constant_key(item) for item in value)
+    elif typ is float or typ is complex or typ is frozenset:
+        # distinguish 0.0 from -0.0, and frozenset({1}) from frozenset({True})
+        return typ, repr(value)
+    else:
+        return typ, value
+
+
+@functools.lru_cache(maxsize=8192)
+def _intern_constant(node: Expression) -> Expression:
+    return node
+
 
 Stack = List[Expression]
 
@@ -29,43 +150,62 @@ class TopLevelExpression(Expression):
     precedence: ClassVar[int] = 0
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Constant(Expression):
     precedence: ClassVar[int] = 15
 
     value: Any
 
+    @classmethod
+    def intern(cls, value: Any) -> Expression:
+        "Returns a shared instance for constants that have the same representation."
+
+        node = cls(value)
+        try:
+            return _intern_constant(node)
+        except TypeError:
+            return node
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Constant):
+            return NotImplemented
+        return _constant_key(self.value) == _constant_key(other.value)
+
+    def __hash__(self) -> int:
+        return hash(_constant_key(self.value))
+
     def negate(self) -> Constant:
         if self.value is True or self.value is False:
-            return Constant(not self.value)
+            return Constant.intern(not self.value)
         else:
             raise TypeError(f"cannot negate non-Boolean type: {type(self.value)}")
 
-    def __str__(self):
-        return repr(self.value)
+    def fragments(self) -> Sequence[Fragment]:
+        return (repr(self.value),)
 
 
 @dataclass(frozen=True)
 class SequenceExpression(Expression):
     precedence: ClassVar[int] = 15
+    open: ClassVar[str]
+    close: ClassVar[str]
 
-    exprs: List[Expression]
+    exprs: Tuple[Expression, ...]
 
-    def to_string(self, open: str, close: str):
-        parts = ", ".join(str(e) for e in self.exprs)
-        return f"{open}{parts}{close}"
+    def fragments(self) -> Sequence[Fragment]:
+        return _join_fragments(self.open, _COMMA, self.exprs, self.close)
 
 
 @dataclass(frozen=True)
 class TupleExpression(SequenceExpression):
-    def __str__(self):
-        return self.to_string("(", ")")
+    open: ClassVar[str] = "("
+    close: ClassVar[str] = ")"
 
 
 @dataclass(frozen=True)
 class ListExpression(SequenceExpression):
-    def __str__(self):
-        return self.to_string("[", "]")
+    open: ClassVar[str] = "["
+    close: ClassVar[str] = "]"
 
 
 @dataclass(frozen=True)
@@ -74,8 +214,8 @@ class ClosureRef(Expression):
 
     name: str
 
-    def __str__(self):
-        return str(self.name)
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.name,)
 
 
 @dataclass(frozen=True)
@@ -84,8 +224,8 @@ class LocalRef(Expression):
 
     name: str
 
-    def __str__(self):
-        return str(self.name)
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.name,)
 
 
 @dataclass(frozen=True)
@@ -94,14 +234,14 @@ class GlobalRef(Expression):
 
     name: str
 
-    def __str__(self):
-        return str(self.name)
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.name,)
 
 
 @dataclass(frozen=True)
 class NegateableExpression(Expression):
     def negate(self) -> Expression:
-        return Negation(self)
+        return Negation.intern(self)
 
 
 @dataclass(frozen=True)
@@ -111,8 +251,8 @@ class AttributeAccess(NegateableExpression):
     base: Expression
     attr_name: str
 
-    def __str__(self):
-        return f"{self.base}.{self.attr_name}"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.base, ".", self.attr_name)
 
 
 @dataclass(frozen=True)
@@ -122,8 +262,8 @@ class IndexAccess(NegateableExpression):
     base: Expression
     index: int
 
-    def __str__(self):
-        return f"{self.base}[{self.index}]"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.base, f"[{self.index}]")
 
 
 @dataclass(frozen=True)
@@ -131,7 +271,7 @@ class FunctionCall(NegateableExpression):
     precedence: ClassVar[int] = 13
 
     base: Expression
-    pargs: List[Expression]
+    pargs: Tuple[Expression, ...]
     kwargs: Dict[str, Expression] = field(default_factory=dict)
 
     def get_function_name(self) -> Optional[str]:
@@ -140,44 +280,61 @@ class FunctionCall(NegateableExpression):
         else:
             return None
 
-    def is_dispatchable(self, fn: Callable) -> bool:
-        "True if this function expression can be used to invoke the given signature."
+    def try_bind_args(self, fn: Callable) -> Optional[inspect.BoundArguments]:
+        "Maps arguments of this function expression to named arguments of a callable, or None if the signature does not match."
 
         name = self.get_function_name()
-        if name is None:
-            return False
+        if name is None or name != fn.__name__:
+            return None
 
-        if name != fn.__name__:
-            return False
+        if not self.kwargs:
+            # reject a wrong number of positional arguments without binding
+            arity = _positional_arity(fn)
+            if arity is not None and not arity.accepts(len(self.pargs)):
+                return None
 
-        sig = inspect.signature(fn)
+        sig = _signature(fn)
         try:
-            sig.bind(*self.pargs, **self.kwargs)
+            ba = sig.bind(*self.pargs, **self.kwargs)
         except TypeError:
-            return False
+            return None
 
-        return True
+        ba.apply_defaults()
+        return ba
+
+    def is_dispatchable(self, fn: Callable) -> bool:
+        "True if this function expression can be used to invoke the given signature."
+
+        return self.try_bind_args(fn) is not None
 
     def bind_args(self, fn: Callable) -> inspect.BoundArguments:
         "Maps positional and keyword arguments of this function expression to named arguments of a callable."
 
-        name = self.get_function_name()
-        if name is None or name != fn.__name__:
+        ba = self.try_bind_args(fn)
+        if ba is None:
             raise TypeError("incompatible callable type signature")
-
-        sig = inspect.signature(fn)
-        ba = sig.bind(*self.pargs, **self.kwargs)
-        ba.apply_defaults()
         return ba
 
-    def __str__(self):
-        args = ", ".join(
-            itertools.chain(
-                (str(parg) for parg in self.pargs),
-                (f"{name}={value}" for (name, value) in self.kwargs.items()),
-            )
-        )
-        return f"{self.base}({args})"
+    def fragments(self) -> Sequence[Fragment]:
+        if isinstance(self.base, Expression):
+            out: List[Fragment] = [self.base, "("]
+        else:
+            # built-in function (e.g. `len`) referenced directly by an instruction
+            out = [str(self.base), "("]
+        separator = False
+        for parg in self.pargs:
+            if separator:
+                out.append(_COMMA)
+            out.append(parg)
+            separator = True
+        for name, value in self.kwargs.items():
+            if separator:
+                out.append(_COMMA)
+            out.append(f"{name}=")
+            out.append(value)
+            separator = True
+        out.append(")")
+        return out
 
 
 @dataclass
@@ -205,10 +362,14 @@ class Dispatcher:
             return None
 
         fn = self.function_mapping.get(name, None)
-        if not fn or not call.is_dispatchable(fn):
+        if not fn:
+            return None
+
+        # bind arguments only once, the binding both checks and maps arguments
+        ba = call.try_bind_args(fn)
+        if ba is None:
             return None
 
-        ba = call.bind_args(fn)
         return BoundSignature(fn, ba)
 
 
@@ -216,8 +377,8 @@ class Dispatcher:
 class UnaryExpression(Expression):
     expr: Expression
 
-    def __str__(self):
-        return f"{self.op}{self.expr}"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.op, self.expr)
 
 
 @dataclass(frozen=True)
@@ -225,8 +386,8 @@ class BinaryExpression(Expression):
     left: Expression
     right: Expression
 
-    def __str__(self):
-        return f"{self.left} {self.op} {self.right}"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.left, f" {self.op} ", self.right)
 
 
 @dataclass(frozen=True)
@@ -307,35 +468,38 @@ class BitwiseOr(BinaryExpression):
     op: ClassVar[str] = "|"
 
 
-def _negate_comparison_operator():
-    ops = [
-        ("==", "!="),
-        ("<", ">="),
-        ("<=", ">"),
-        ("in", "not in"),
-        ("is", "is not"),
-    ]
-    op_map = {}
-    op_map.update((op[0], op[1]) for op in ops)
-    op_map.update((op[1], op[0]) for op in ops)
-    return op_map
+# maps each comparison operator to its logical complement
+_NEGATE_COMPARISON_OPERATOR: Mapping[str, str] = types.MappingProxyType(
+    {
+        "==": "!=",
+        "!=": "==",
+        "<": ">=",
+        ">=": "<",
+        "<=": ">",
+        ">": "<=",
+        "in": "not in",
+        "not in": "in",
+        "is": "is not",
+        "is not": "is",
+    }
+)
 
 
 @dataclass(frozen=True)
 class Comparison(Expression):
     precedence: ClassVar[int] = 4
 
-    negate_op: ClassVar[Dict[str, str]] = _negate_comparison_operator()
+    negate_op: ClassVar[Mapping[str, str]] = _NEGATE_COMPARISON_OPERATOR
 
     op: str
     left: Expression
     right: Expression
 
     def negate(self) -> Expression:
-        return Comparison(self.negate_op[self.op], self.left, self.right)
+        return Comparison.intern(self.negate_op[self.op], self.left, self.right)
 
-    def __str__(self):
-        return f"{self.left} {self.op} {self.right}"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.left, f" {self.op} ", self.right)
 
 
 @dataclass(frozen=True)
@@ -347,39 +511,51 @@ class Negation(Expression):
     def negate(self) -> Expression:
         return self.expr
 
-    def __str__(self):
-        return f"not {self.expr}"
+    def fragments(self) -> Sequence[Fragment]:
+        return ("not ", self.expr)
 
 
 @dataclass(frozen=True)
 class BooleanExpression(Expression):
-    exprs: List[Expression]
+    adjoiner: ClassVar[str]
 
-    def to_string(self, adjoiner: str):
-        parts = f" {adjoiner} ".join(str(e) for e in self.exprs)
-        return f"({parts})"
+    exprs: Tuple[Expression, ...]
+
+    def fragments(self) -> Sequence[Fragment]:
+        return _join_fragments("(", self.adjoiner, self.exprs, ")")
+
+    @classmethod
+    def create(cls, exprs: Tuple[Expression, ...]) -> BooleanExpression:
+        "Creates a Boolean expression, merging members of the same kind (e.g. (a and b) and c becomes a and b and c)."
+
+        if not any(type(expr) is cls for expr in exprs):
+            return cls(exprs)
+
+        flat: List[Expression] = []
+        for expr in exprs:
+            if type(expr) is cls:
+                flat.extend(expr.exprs)
+            else:
+                flat.append(expr)
+        return cls(tuple(flat))
 
 
 @dataclass(frozen=True)
 class Conjunction(BooleanExpression):
     precedence: ClassVar[int] = 2
+    adjoiner: ClassVar[str] = _AND
 
     def negate(self) -> Expression:
-        return Disjunction([expr.negate() for expr in self.exprs])
-
-    def __str__(self):
-        return self.to_string("and")
+        return Disjunction.create(tuple(expr.negate() for expr in self.exprs))
 
 
 @dataclass(frozen=True)
 class Disjunction(BooleanExpression):
     precedence: ClassVar[int] = 1
+    adjoiner: ClassVar[str] = _OR
 
     def negate(self) -> Expression:
-        return Conjunction([expr.negate() for expr in self.exprs])
-
-    def __str__(self):
-        return self.to_string("or")
+        return Conjunction.create(tuple(expr.negate() for expr in self.exprs))
 
 
 @dataclass(frozen=True)
@@ -391,23 +567,28 @@ class IfThenElse(Expression):
     on_false: Expression
 
     def negate(self) -> Expression:
-        return IfThenElse(self.condition, self.on_false.negate(), self.on_true.negate())
+        return IfThenElse.intern(
+            self.condition, self.on_false.negate(), self.on_true.negate()
+        )
 
-    def __str__(self):
-        return f"{self.on_true} if {self.condition} else {self.on_false}"
+    def fragments(self) -> Sequence[Fragment]:
+        return (self.on_true, " if ", self.condition, " else ", self.on_false)
 
     @classmethod
     def create(
         cls, condition: Expression, on_true: Expression, on_false: Expression
     ) -> Expression:
         if condition == on_false:
-            result = Conjunction([on_false, on_true])
-        elif condition == on_true:
-            result = Disjunction([on_true, on_false])
-        elif condition.negate() == on_true:
-            result = Conjunction([on_true, on_false])
-        elif condition.negate() == on_false:
-            result = Disjunction([on_false, on_true])
+            return Conjunction.create((on_false, on_true))
+        if condition == on_true:
+            return Disjunction.create((on_true, on_false))
+
+        # negate condition only once, negation may allocate a new node
+        negated = condition.negate()
+        if negated == on_true:
+            result = Conjunction.create((on_true, on_false))
+        elif negated == on_false:
+            result = Disjunction.create((on_false, on_true))
         else:
             result = IfThenElse(condition, on_true, on_false)
         return result
@@ -3,12 +3,16 @@ Fundamental generic types and type inspection.
 """
 
 import dataclasses
-import typing
+import functools
+import operator
+import types
 from typing import (
     Any,
+    Callable,
     Dict,
     Optional,
     Protocol,
+    Tuple,
     Type,
     TypeVar,
     Union,
@@ -26,29 +30,26 @@ T6 = TypeVar("T6")
 def is_lambda(v) -> bool:
     "True if (and only if) argument holds a lambda function."
 
-    LAMBDA = lambda: None
-    return isinstance(v, type(LAMBDA)) and v.__name__ == LAMBDA.__name__
+    return isinstance(v, types.LambdaType) and v.__name__ == "<lambda>"
 
 
 def is_optional_type(typ: Type[Any]) -> bool:
     "True if the type is an optional type (e.g. Optional[T] or Union[T1,T2,None])."
 
-    if typing.get_origin(typ) is Union:  # Optional[T] is represented as Union[T, None]
-        return type(None) in typing.get_args(typ)
-
-    return False
+    # Optional[T] is represented as Union[T, None]
+    return getattr(typ, "__origin__", None) is Union and type(None) in typ.__args__
 
 
 def unwrap_optional_type(typ: Type[Optional[T]]) -> Type[T]:
     "Extracts the type qualified as optional (e.g. returns T for Optional[T])."
 
     # Optional[T] is represented internally as Union[T, None]
-    if typing.get_origin(typ) is not Union:
+    if getattr(typ, "__origin__", None) is not Union:
         raise TypeError("optional type must have un-subscripted type of Union")
 
     # will automatically unwrap Union[T] into T
     return Union[
-        tuple(filter(lambda item: item is not type(None), typing.get_args(typ)))
+        tuple(item for item in typ.__args__ if item is not type(None))
     ]  # type: ignore
 
 
@@ -70,10 +71,58 @@ class DataClass(Protocol[T]):
 def is_dataclass_type(typ) -> bool:
     "True if the argument corresponds to a data class type (but not an instance)."
 
-    return isinstance(typ, type) and dataclasses.is_dataclass(typ)
+    # same test as `dataclasses.is_dataclass` but without re-checking whether the argument is a type
+    return isinstance(typ, type) and hasattr(typ, "__dataclass_fields__")
 
 
 def is_dataclass_instance(obj) -> bool:
     "True if the argument corresponds to a data class instance (but not a type)."
 
-    return not isinstance(obj, type) and dataclasses.is_dataclass(obj)
+    return not isinstance(obj, type) and hasattr(type(obj), "__dataclass_fields__")
+
+
+def quote_identifier(name: str) -> str:
+    "Quotes a SQL identifier such as a table or column name."
+
+    return '"' + name.replace('"', '""') + '"'
+
+
+def get_table_identifier(typ: type) -> str:
+    "Returns the (unquoted) name of the database table that a data class type maps to."
+
+    return typ.__name__
+
+
+@functools.lru_cache(maxsize=None)
+def get_table_name(typ: type) -> str:
+    "Returns the (quoted) name of the database table that a data class type maps to."
+
+    return quote_identifier(get_table_identifier(typ))
+
+
+@dataclasses.dataclass(frozen=True)
+class FieldPlan:
+    "Field names and accessors of a data class type, computed once per type."
+
+    fields: Tuple[dataclasses.Field, ...]
+    names: Tuple[str, ...]
+    values: Callable[[Any], Tuple[Any, ...]]
+
+
+@functools.lru_cache(maxsize=None)
+def get_field_plan(typ: type) -> FieldPlan:
+    "Returns the (cached) field plan of a data class type."
+
+    fields = dataclasses.fields(typ)
+    names = tuple(field.name for field in fields)
+
+    # fetch all field values in a single call (attrgetter returns a scalar for a single name)
+    if len(names) > 1:
+        values = operator.attrgetter(*names)
+    elif names:
+        getter = operator.attrgetter(names[0])
+        values = lambda obj: (getter(obj),)
+    else:
+        values = lambda obj: ()
+
+    return FieldPlan(fields=fields, names=names, values=values)
@@ -7,15 +7,15 @@ This module is used internally.
 from __future__ import annotations
 
 import builtins
-import dataclasses
+import collections
 import enum
 import functools
 from dataclasses import MISSING, dataclass
 from datetime import date, time
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from .ast import *
-from .base import DataClass, is_dataclass_instance
+from .base import DataClass, get_field_plan, get_table_name, is_dataclass_instance
 from .core import *
 
 _aggregate_functions = Dispatcher([avg, count, max, min, sum])
@@ -36,8 +36,24 @@ class _JoinType(enum.Enum):
     FullJoin = full_join.__name__
 
 
+_JOIN_TYPE_SQL = {
+    _JoinType.InnerJoin: "INNER",
+    _JoinType.LeftJoin: "LEFT",
+    _JoinType.RightJoin: "RIGHT",
+    _JoinType.FullJoin: "FULL",
+}
+
+# join type to use when the left and right side of a join are exchanged
+_SWAPPED_JOIN_TYPE = {
+    _JoinType.LeftJoin: _JoinType.RightJoin,
+    _JoinType.RightJoin: _JoinType.LeftJoin,
+}
+
+
 @dataclass
 class _EntityJoin:
+    __slots__ = ("join_type", "left_entity", "left_attr", "right_entity", "right_attr")
+
     join_type: _JoinType
     left_entity: str
     left_attr: str
@@ -45,14 +61,8 @@ class _EntityJoin:
     right_attr: str
 
     def swap(self) -> _EntityJoin:
-        if self.join_type is _JoinType.LeftJoin:
-            swap_type = _JoinType.RightJoin
-        elif self.join_type is _JoinType.RightJoin:
-            swap_type = _JoinType.LeftJoin
-        else:
-            swap_type = self.join_type
         return _EntityJoin(
-            swap_type,
+            _SWAPPED_JOIN_TYPE.get(self.join_type, self.join_type),
             self.right_entity,
             self.right_attr,
             self.left_entity,
@@ -60,22 +70,17 @@ class _EntityJoin:
         )
 
     def as_join(self, entity_aliases):
-        if self.join_type is _JoinType.InnerJoin:
-            join_type = "INNER"
-        elif self.join_type is _JoinType.LeftJoin:
-            join_type = "LEFT"
-        elif self.join_type is _JoinType.RightJoin:
-            join_type = "RIGHT"
-        elif self.join_type is _JoinType.FullJoin:
-            join_type = "FULL"
+        join_type = _JOIN_TYPE_SQL[self.join_type]
         return f"{join_type} JOIN {entity_aliases[self.right_entity]} ON {self.left_entity}.{self.left_attr} = {self.right_entity}.{self.right_attr}"
 
 
 class _EntityJoinCollection:
     entity_joins: Dict[Tuple[str, str], _EntityJoin]
+    neighbors: Dict[str, Set[str]]
 
     def __init__(self):
         self.entity_joins = {}
+        self.neighbors = {}
 
     def __str__(self) -> str:
         return "\n".join(str(e) for e in self.entity_joins.values())
@@ -96,12 +101,16 @@ class _EntityJoinCollection:
         self.entity_joins[(min_entity, max_entity)] = _EntityJoin(
             join_type, left_entity, left_attr, right_entity, right_attr
         )
+        self.neighbors.setdefault(left_entity, set()).add(right_entity)
+        self.neighbors.setdefault(right_entity, set()).add(left_entity)
 
     def pop(self, left_entity: str, right_entity: str) -> Optional[_EntityJoin]:
         min_entity = builtins.min(left_entity, right_entity)
         max_entity = builtins.max(left_entity, right_entity)
         entity_join = self.entity_joins.pop((min_entity, max_entity), None)
         if entity_join:
+            self.neighbors[left_entity].discard(right_entity)
+            self.neighbors[right_entity].discard(left_entity)
             if left_entity != entity_join.left_entity:
                 return entity_join.swap()
             else:
@@ -118,7 +127,7 @@ class _OrderType(enum.Enum):
 
 def _list_to_conj_expr(parts: List[Expression]) -> Union[Conjunction, Expression, None]:
     if len(parts) > 1:
-        return Conjunction(parts)
+        return Conjunction(tuple(parts))
     elif len(parts) == 1:
         return parts[0]
     else:
@@ -142,11 +151,18 @@ class _JoinExtractor:
     @visit.register
     def _(self, conj: Conjunction) -> Union[Conjunction, Expression, None]:
         parts = []
+        changed = False
         for expr in conj.exprs:
             part = self.visit(expr)
-            if part:
+            if part is not expr:
+                changed = True
+            if part is not None:
                 parts.append(part)
 
+        # keep the original (shared) node when no join condition has been removed
+        if not changed:
+            return conj
+
         return _list_to_conj_expr(parts)
 
     @visit.register
@@ -197,9 +213,12 @@ class _ConditionContextClassifier:
     def visit(self, arg: Expression) -> _ConditionContext:
         self._context = _ConditionContext.UNDECIDED
         self._inside_aggregation = False
-        self._visit(arg)
+        self._classify(arg)
         return self._context
 
+    def _classify(self, arg: Expression) -> None:
+        self._dispatch(type(arg))(self, arg)
+
     @functools.singledispatchmethod
     def _visit(self, _: Expression) -> None:
         pass
@@ -207,21 +226,21 @@ class _ConditionContextClassifier:
     @_visit.register
     def _(self, bool_expr: BooleanExpression) -> None:
         for expr in bool_expr.exprs:
-            self._visit(expr)
+            self._classify(expr)
 
     @_visit.register
     def _(self, unary_expr: UnaryExpression) -> None:
-        self._visit(unary_expr.expr)
+        self._classify(unary_expr.expr)
 
     @_visit.register
     def _(self, binary_expr: BinaryExpression) -> None:
-        self._visit(binary_expr.left)
-        self._visit(binary_expr.right)
+        self._classify(binary_expr.left)
+        self._classify(binary_expr.right)
 
     @_visit.register
     def _(self, comp: Comparison) -> None:
-        self._visit(comp.left)
-        self._visit(comp.right)
+        self._classify(comp.left)
+        self._classify(comp.right)
 
     @_visit.register
     def _(self, call: FunctionCall) -> None:
@@ -246,11 +265,11 @@ class _ConditionContextClassifier:
             )
 
         # process regular functions
-        self._visit(call.base)
+        self._classify(call.base)
         for arg in call.pargs:
-            self._visit(arg)
+            self._classify(arg)
         for _, arg in call.kwargs.items():
-            self._visit(arg)
+            self._classify(arg)
 
     def _visit_aggregation_func(self, sig: BoundSignature, call: FunctionCall) -> None:
         if self._context is _ConditionContext.UNDECIDED:
@@ -262,12 +281,12 @@ class _ConditionContextClassifier:
                     f"cannot nest aggregation function {sig.name} inside another"
                 )
 
-            self._visit(call.base)
+            self._classify(call.base)
             self._inside_aggregation = True
             for arg in call.pargs:
-                self._visit(arg)
+                self._classify(arg)
             for _, arg in call.kwargs.items():
-                self._visit(arg)
+                self._classify(arg)
             self._inside_aggregation = False
 
         elif self._context is _ConditionContext.WHERE:
@@ -277,7 +296,7 @@ class _ConditionContextClassifier:
 
     @_visit.register
     def _(self, attr: AttributeAccess) -> None:
-        self._visit(attr.base)
+        self._classify(attr.base)
 
     @_visit.register
     def _(self, arg: LocalRef) -> None:
@@ -296,6 +315,10 @@ class _ConditionContextClassifier:
     def _(self, arg: Constant) -> Constant:
         return arg
 
+    # look up implementations by type directly; accessing a single-dispatch method creates a new bound function
+    # each time, which is expensive when visiting every node of an expression tree
+    _dispatch = staticmethod(_visit.dispatcher.dispatch)
+
 
 class _ConditionExtractor:
     _classifier: _ConditionContextClassifier
@@ -343,7 +366,26 @@ class _ConditionExtractor:
             self._where.append(expr)
 
 
+# marks the start of a new (sub-)expression when checking whether parentheses are needed
+_TOP_LEVEL_EXPRESSION = TopLevelExpression.intern()
+
 _query_parameters = [p_1, p_2, p_3, p_4, p_5, p_6, p_7, p_8, p_9]
+_query_parameters_by_name = {param.name: param for param in _query_parameters}
+
+# maps Python comparison operators to SQL
+_COMPARISON_OPERATORS = {
+    "==": "=",
+    "!=": "<>",
+    "<": "<",
+    "<=": "<=",
+    ">=": ">=",
+    ">": ">",
+    "in": "IN",
+    "not in": "NOT IN",
+}
+
+# maps Python comparison operators with None as right operand to SQL
+_NULL_COMPARISON_OPERATORS = {"is": "IS NULL", "is not": "IS NOT NULL"}
 
 
 class _QueryVisitor:
@@ -353,11 +395,11 @@ class _QueryVisitor:
     def __init__(self, closure_vars: Dict[str, Any]):
         self.closure_vars = closure_vars
         self.parameters = set()
-        self.stack = [TopLevelExpression()]
+        self.stack = [_TOP_LEVEL_EXPRESSION]
 
     def visit(self, arg: Expression) -> str:
         self.stack.append(arg)
-        expr = self._visit(arg)
+        expr = self._dispatch(type(arg))(self, arg)
         self.stack.pop()
 
         if arg.precedence < self.stack[-1].precedence:
@@ -372,7 +414,7 @@ class _QueryVisitor:
         )
 
     def _sql_where_expr(self, adjoiner: str, exprs: List[Expression]) -> str:
-        return f" {adjoiner} ".join(self.visit(expr) for expr in exprs)
+        return f" {adjoiner} ".join([self.visit(expr) for expr in exprs])
 
     def _sql_unary_expr(self, op: str, unary_expr: UnaryExpression) -> str:
         expr = self.visit(unary_expr.expr)
@@ -449,31 +491,15 @@ class _QueryVisitor:
     @_visit.register
     def _(self, comp: Comparison) -> str:
         if isinstance(comp.right, Constant) and comp.right.value is None:
-            left = self.visit(comp.left)
-            if comp.op == "is":
-                return f"{left} IS NULL"
-            elif comp.op == "is not":
-                return f"{left} IS NOT NULL"
-        elif comp.op in ["in", "not in"]:
-            left = self.visit(comp.left)
-            right = self.visit(comp.right)
-            if comp.op == "in":
-                return f"{left} IN {right}"
-            elif comp.op == "not in":
-                return f"{left} NOT IN {right}"
+            op = _NULL_COMPARISON_OPERATORS.get(comp.op)
+            if op is not None:
+                left = self.visit(comp.left)
+                return f"{left} {op}"
         else:
-            left = self.visit(comp.left)
-            right = self.visit(comp.right)
-            binary_ops = {
-                "==": "=",
-                "!=": "<>",
-                "<": "<",
-                "<=": "<=",
-                ">=": ">=",
-                ">": ">",
-            }
-            if comp.op in binary_ops:
-                op = binary_ops[comp.op]
+            op = _COMPARISON_OPERATORS.get(comp.op)
+            if op is not None:
+                left = self.visit(comp.left)
+                right = self.visit(comp.right)
                 return f"{left} {op} {right}"
 
         raise TypeError(f"illegal comparison: {comp}")
@@ -515,7 +541,7 @@ class _QueryVisitor:
 
         sig = _conditional_aggregate_functions.get(call)
         if sig:
-            self.stack.append(TopLevelExpression())
+            self.stack.append(_TOP_LEVEL_EXPRESSION)
             sql_args = self._sql_func_args(sig)
             self.stack.pop()
             func = sig.name.replace("_if", "").upper()
@@ -576,10 +602,10 @@ class _QueryVisitor:
 
     @_visit.register
     def _(self, arg: GlobalRef) -> str:
-        for param in _query_parameters:
-            if arg.name == param.name:
-                self.parameters.add(param)
-                return param
+        param = _query_parameters_by_name.get(arg.name)
+        if param is not None:
+            self.parameters.add(param)
+            return param
         return arg.name
 
     @_visit.register
@@ -588,8 +614,8 @@ class _QueryVisitor:
 
     @_visit.register
     def _(self, arg: TupleExpression) -> str:
-        self.stack.append(TopLevelExpression())
-        value = ", ".join(self.visit(expr) for expr in arg.exprs)
+        self.stack.append(_TOP_LEVEL_EXPRESSION)
+        value = ", ".join([self.visit(expr) for expr in arg.exprs])
         self.stack.pop()
         return value
 
@@ -600,16 +626,26 @@ class _QueryVisitor:
         else:
             return str(arg.value)
 
+    # look up implementations by type directly; accessing a single-dispatch method creates a new bound function
+    # each time, which is expensive when visiting every node of an expression tree
+    _dispatch = staticmethod(_visit.dispatcher.dispatch)
+
 
 def _to_sql_string(s: str) -> str:
     "Converts a Python string object into a string that can be directly embedded in a SQL string."
 
+    if "'" not in s:
+        # most strings contain no quotes, skip building an escaped copy
+        return f"'{s}'"
+
     escaped_string = s.replace("'", "''")
     return f"'{escaped_string}'"
 
 
 @dataclass
 class Context:
+    __slots__ = ("local_vars", "closure_vars", "global_vars")
+
     local_vars: List[str]
     closure_vars: Dict[str, Any]
     global_vars: Dict[str, Any]
@@ -617,6 +653,7 @@ class Context:
 
 class _SelectExtractor:
     _query_visitor: _QueryVisitor
+    _classifier: _ConditionContextClassifier
 
     return_type: type = None
     local_vars: List[str]
@@ -632,6 +669,7 @@ class _SelectExtractor:
         global_vars: Dict[str, Any],
     ):
         self._query_visitor = query_visitor
+        self._classifier = _ConditionContextClassifier(local_vars)
         self.local_vars = local_vars
         self.global_vars = global_vars
         self.select = []
@@ -674,8 +712,8 @@ class _SelectExtractor:
                 self._visit(expr)
 
             # reorder keyword arguments to match the order defined in the data class
-            for f in dataclasses.fields(typ)[len(call.pargs) :]:
-                expr = call.kwargs.get(f.name, MISSING)
+            for name in get_field_plan(typ).names[len(call.pargs) :]:
+                expr = call.kwargs.get(name, MISSING)
                 if expr is MISSING:
                     self.select.append("NULL")
                 else:
@@ -698,12 +736,13 @@ class _SelectExtractor:
     def _is_aggregate(self, expr: Expression) -> bool:
         "True if an expression in a SELECT clause is an aggregation expression."
 
-        context = _ConditionContextClassifier(self.local_vars).visit(expr)
-        return context is _ConditionContext.HAVING
+        return self._classifier.visit(expr) is _ConditionContext.HAVING
 
 
 @dataclass
 class QueryBuilderArgs:
+    __slots__ = ("source", "context", "cond_expr", "yield_expr")
+
     source: EntityProxy
     context: Context
     cond_expr: Expression
@@ -721,14 +760,14 @@ class QueryBuilder:
 
         # construct JOIN expression "a JOIN b ON a.foreign_key = b.primary_key JOIN ..."
         entity_aliases = {
-            var: f'"{typ.__name__}" AS {var}'
+            var: f"{get_table_name(typ)} AS {var}"
             for typ, var in zip(qba.source.types, qba.context.local_vars)
         }
-        remaining_entities = qba.context.local_vars.copy()
+        remaining_entities = collections.deque(qba.context.local_vars)
         sql_join = []
         while remaining_entities:
-            first = remaining_entities.pop(0)
-            joined_entities = set([first])
+            first = remaining_entities.popleft()
+            joined_entities = [first]
             sql_join_group = [entity_aliases[first]]
 
             while True:
@@ -738,7 +777,7 @@ class QueryBuilder:
                 if not entity_join:
                     break
 
-                joined_entities.add(entity_join.right_entity)
+                joined_entities.append(entity_join.right_entity)
                 remaining_entities.remove(entity_join.right_entity)
 
                 sql_join_group.append(entity_join.as_join(entity_aliases))
@@ -810,7 +849,7 @@ class QueryBuilder:
             raise QueryTypeError(
                 f"object to insert has wrong type: {type(insert_obj)}, expected: {entity_type}"
             )
-        sql_from = f'"{entity_type.__name__}" AS {entity_var}'
+        sql_from = f"{get_table_name(entity_type)} AS {entity_var}"
 
         # split compound conditional expression into parts
         condition_visitor = _ConditionExtractor(qba.context.local_vars)
@@ -852,11 +891,11 @@ class QueryBuilder:
         else:
             offset = 1
 
-        fields = dataclasses.fields(insert_obj)
+        plan = get_field_plan(type(insert_obj))
         insert_names = [
-            field.name
-            for field in fields
-            if getattr(insert_obj, field.name) is not DEFAULT
+            name
+            for name, value in zip(plan.names, plan.values(insert_obj))
+            if value is not DEFAULT
         ]
         sql_insert_names = ", ".join(insert_names)
         sql_insert_placeholders = ", ".join(
@@ -869,7 +908,10 @@ class QueryBuilder:
         return Query(typ, sql)
 
     def _match_entities(
-        self, entity_joins, joined_entities: List[str], remaining_entities: List[str]
+        self,
+        entity_joins: _EntityJoinCollection,
+        joined_entities: List[str],
+        remaining_entities: Iterable[str],
     ) -> Optional[_EntityJoin]:
         """
         Pairs up entities with one another along a join expression.
@@ -880,8 +922,12 @@ class QueryBuilder:
         """
 
         for left in joined_entities:
+            # only entities that share a join condition with this entity are candidates
+            neighbors = entity_joins.neighbors.get(left)
+            if not neighbors:
+                continue
+
             for right in remaining_entities:
-                entity_join = entity_joins.pop(left, right)
-                if entity_join:
-                    return entity_join
+                if right in neighbors:
+                    return entity_joins.pop(left, right)
         return None
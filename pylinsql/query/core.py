@@ -9,6 +9,8 @@ from .base import T, T1, T2, T3, T4, T5, T6, is_dataclass_type
 
 
 class EntityProxy:
+    __slots__ = ("types",)
+
     def __init__(self, types: List[Type]):
         self.types = types
 
@@ -206,17 +208,19 @@ class _QueryParameter:
 
     def __init__(self, index):
         self.index = index
+        self._name = f"p_{index}"
+        self._sql = f"${index}"
 
     @property
     def name(self):
         "Expression representation (i.e. as used in a Python generator expression)."
 
-        return f"p_{self.index}"
+        return self._name
 
     def __str__(self):
         "PostgreSQL representation (i.e. as used in a SQL query)."
 
-        return f"${self.index}"
+        return self._sql
 
 
 p_1 = _QueryParameter(1)
@@ -225,9 +229,9 @@ p_3 = _QueryParameter(3)
 p_4 = _QueryParameter(4)
 p_5 = _QueryParameter(5)
 p_6 = _QueryParameter(6)
-p_7 = _QueryParameter(6)
-p_8 = _QueryParameter(6)
-p_9 = _QueryParameter(6)
+p_7 = _QueryParameter(7)
+p_8 = _QueryParameter(8)
+p_9 = _QueryParameter(9)
 
 
 class _DefaultValue:
@@ -242,6 +246,8 @@ DEFAULT = _DefaultValue
 class Query(Generic[T]):
     "A query constructed from a Python generator expression."
 
+    __slots__ = ("typ", "sql")
+
     typ: type
     sql: str
 
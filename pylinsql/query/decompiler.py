@@ -246,8 +246,8 @@ class CodeExpressionAnalyzer:
         # conditional nodes (several interconnected blocks that jump on conditions)
 
         # create special nodes `True` and `False`
-        true_node = AbstractNode(Constant(True))
-        false_node = AbstractNode(Constant(False))
+        true_node = AbstractNode(Constant.intern(True))
+        false_node = AbstractNode(Constant.intern(False))
 
         true_nodes = yield_node.get_unconditional_ancestors()
         false_nodes = iterator_node.get_unconditional_ancestors()
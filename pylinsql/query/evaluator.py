@@ -10,7 +10,7 @@ import sys
 from dataclasses import dataclass
 from dis import Instruction
 from types import CodeType
-from typing import Optional
+from typing import Optional, Tuple
 
 from .ast import *
 
@@ -134,23 +134,25 @@ class Evaluator:
 
     def LOAD_ATTR(self, name_index):
         base = self.stack.pop()
-        self.stack.append(AttributeAccess(base, self.codeobject.co_names[name_index]))
+        self.stack.append(
+            AttributeAccess.intern(base, self.codeobject.co_names[name_index])
+        )
 
     def LOAD_CONST(self, const_index):
-        self.stack.append(Constant(self.codeobject.co_consts[const_index]))
+        self.stack.append(Constant.intern(self.codeobject.co_consts[const_index]))
 
     def LOAD_FAST(self, var_num):
-        self.stack.append(LocalRef(self.codeobject.co_varnames[var_num]))
+        self.stack.append(LocalRef.intern(self.codeobject.co_varnames[var_num]))
 
     def LOAD_GLOBAL(self, name_index):
-        self.stack.append(GlobalRef(self.codeobject.co_names[name_index]))
+        self.stack.append(GlobalRef.intern(self.codeobject.co_names[name_index]))
 
     def LOAD_DEREF(self, i):
         if i < len(self.codeobject.co_cellvars):
             name = self.codeobject.co_cellvars[i]
         else:
             name = self.codeobject.co_freevars[i - len(self.codeobject.co_cellvars)]
-        self.stack.append(ClosureRef(name))
+        self.stack.append(ClosureRef.intern(name))
 
     def STORE_FAST(self, var_num):
         self.stack.pop()
@@ -158,11 +160,11 @@ class Evaluator:
         if var_name not in self.variables:
             self.variables.append(var_name)
 
-    def _pop_func_args(self, argc: int) -> List[Expression]:
-        args = []
-        for _ in range(argc):
-            args.append(self.stack.pop())
-        args.reverse()
+    def _pop_func_args(self, argc: int) -> Tuple[Expression, ...]:
+        if not argc:
+            return ()
+        args = tuple(self.stack[-argc:])
+        del self.stack[-argc:]
         return args
 
     def CALL_FUNCTION(self, argc):
@@ -179,11 +181,8 @@ class Evaluator:
         values = self._pop_func_args(len(names))
         kwargs = {name: value for name, value in zip(names, values)}
 
-        # positional arguments in reverse order
-        pargs = []
-        for _ in range(argc - len(names)):
-            pargs.append(self.stack.pop())
-        pargs.reverse()
+        # positional arguments
+        pargs = self._pop_func_args(argc - len(names))
 
         func = self.stack.pop()
         self.stack.append(FunctionCall(func, pargs, kwargs))
@@ -216,7 +215,7 @@ class Evaluator:
     def _compare_op(self, op: str, invert: bool):
         right = self.stack.pop()
         left = self.stack.pop()
-        comp = Comparison(op, left, right)
+        comp = Comparison.intern(op, left, right)
         if invert:
             self.stack.append(comp.negate())
         else:
@@ -233,7 +232,7 @@ class Evaluator:
         pass
 
     def GET_LEN(self, _):
-        self.stack.append(FunctionCall(builtins.len, [self.stack[-1]]))
+        self.stack.append(FunctionCall(builtins.len, (self.stack[-1],)))
 
     def JUMP_ABSOLUTE(self, target):
         pass
@@ -299,11 +298,7 @@ class Evaluator:
         self._expr.stack = self.stack
 
     def _sequence_op(self, count, cls):
-        values = []
-        for _ in range(count):
-            values.append(self.stack.pop())
-        values.reverse()
-        self.stack.append(cls(values))
+        self.stack.append(cls(self._pop_func_args(count)))
 
     BUILD_TUPLE = lambda self, count: self._sequence_op(count, TupleExpression)
     BUILD_LIST = lambda self, count: self._sequence_op(count, ListExpression)
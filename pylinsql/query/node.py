@@ -10,7 +10,7 @@ from __future__ import annotations
 import functools
 from dataclasses import dataclass
 from dis import Instruction
-from typing import ClassVar, List, Optional
+from typing import ClassVar, List, Optional, Tuple
 
 from .ast import Conjunction, Disjunction, Expression, IfThenElse, Stack
 from .evaluator import Evaluator
@@ -255,7 +255,7 @@ class NodeBooleanExpression(NodeListExpression):
     flag: ClassVar[bool] = None
 
     @classmethod
-    def expression(cls, exprs: List[Expression]) -> Expression:
+    def expression(cls, exprs: Tuple[Expression, ...]) -> Expression:
         ...
 
 
@@ -264,8 +264,8 @@ class NodeConjunction(NodeBooleanExpression):
     flag: ClassVar[bool] = True
 
     @classmethod
-    def expression(cls, exprs: List[Expression]) -> Expression:
-        return Conjunction(exprs)
+    def expression(cls, exprs: Tuple[Expression, ...]) -> Expression:
+        return Conjunction.create(exprs)
 
     def negate(self) -> NodeExpression:
         return NodeDisjunction([item.negate() for item in self.items])
@@ -276,8 +276,8 @@ class NodeDisjunction(NodeBooleanExpression):
     flag: ClassVar[bool] = False
 
     @classmethod
-    def expression(cls, exprs: List[Expression]) -> Expression:
-        return Disjunction(exprs)
+    def expression(cls, exprs: Tuple[Expression, ...]) -> Expression:
+        return Disjunction.create(exprs)
 
     def negate(self) -> NodeExpression:
         return NodeConjunction([item.negate() for item in self.items])
@@ -487,7 +487,7 @@ class NodeVisitor:
         # Boolean expression is part of a condition statement
         # execution branches to true or false blocks based on its value
         exprs.append(expr)
-        return boolean.expression(exprs)
+        return boolean.expression(tuple(exprs))
 
     @_visit.register
     def _(self, conj: NodeConjunction, jump_cond: bool) -> Expression:
@@ -8,13 +8,15 @@ import functools
 import inspect
 import os.path
 import sys
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from types import CodeType
-from typing import Generator, List
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
-from .base import DataClass, T
+from .base import DataClass, T, get_field_plan, is_dataclass_instance
 from .builder import Context, QueryBuilder, QueryBuilderArgs
-from .core import EntityProxy, Query
+from .core import DEFAULT, EntityProxy, Query
 from .decompiler import CodeExpression, CodeExpressionAnalyzer
 
 
@@ -31,7 +33,7 @@ def get_entity_types(sql_generator_expr: Generator) -> List[type]:
     return entity.types
 
 
-@functools.lru_cache
+@functools.lru_cache(maxsize=1024)
 def _analyze_expression(code_object: CodeType) -> CodeExpression:
     code_analyzer = CodeExpressionAnalyzer(code_object)
     try:
@@ -86,12 +88,63 @@ def _query_builder_args(sql_generator_expr: Generator) -> QueryBuilderArgs:
     )
 
 
+class _QueryCache:
+    "A bounded least-recently-used cache of queries built from generator expressions."
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[Tuple, Tuple[Dict[str, Any], Query]] = OrderedDict()
+
+    def get(self, key: Tuple, global_vars: Dict[str, Any]) -> Optional[Query]:
+        with self.lock:
+            entry = self.entries.get(key)
+            # entries hold on to the globals dictionary so that its id is not reused
+            if entry is None or entry[0] is not global_vars:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Tuple, global_vars: Dict[str, Any], query: Query) -> None:
+        with self.lock:
+            self.entries[key] = (global_vars, query)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+_select_cache = _QueryCache(1024)
+_insert_or_select_cache = _QueryCache(1024)
+
+
+def _select_cache_key(
+    sql_generator_expr: Generator, qba: QueryBuilderArgs
+) -> Optional[Tuple]:
+    "A key that identifies the SQL query built from a generator expression, or None if the query cannot be cached."
+
+    code_object = sql_generator_expr.gi_frame.f_code
+    if code_object.co_freevars:
+        # closure variables (e.g. sub-queries) may take a different value each time
+        return None
+
+    return (code_object, tuple(qba.source.types), id(qba.context.global_vars))
+
+
 def select(sql_generator_expr: Generator[T, None, None]) -> Query[T]:
     "Builds a query expression corresponding to a SELECT SQL statement."
 
     qba = _query_builder_args(sql_generator_expr)
+    key = _select_cache_key(sql_generator_expr, qba)
+    if key is not None:
+        query = _select_cache.get(key, qba.context.global_vars)
+        if query is not None:
+            return query
+
     builder = QueryBuilder()
-    return builder.select(qba)
+    query = builder.select(qba)
+    if key is not None:
+        _select_cache.put(key, qba.context.global_vars, query)
+    return query
 
 
 def insert_or_select(
@@ -100,5 +153,22 @@ def insert_or_select(
     "Builds a query expression corresponding to a combined SELECT or INSERT SQL statement."
 
     qba = _query_builder_args(sql_generator_expr)
+    key = _select_cache_key(sql_generator_expr, qba)
+    if key is not None and is_dataclass_instance(insert_obj):
+        # the INSERT part lists only those columns that are not set to DEFAULT
+        insert_type = type(insert_obj)
+        defaults = tuple(
+            value is DEFAULT for value in get_field_plan(insert_type).values(insert_obj)
+        )
+        key = key + (insert_type, defaults)
+        query = _insert_or_select_cache.get(key, qba.context.global_vars)
+        if query is not None:
+            return query
+    else:
+        key = None
+
     builder = QueryBuilder()
-    return builder.insert_or_select(qba, insert_obj)
+    query = builder.insert_or_select(qba, insert_obj)
+    if key is not None:
+        _insert_or_select_cache.put(key, qba.context.global_vars, query)
+    return query
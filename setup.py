@@ -27,5 +27,6 @@ setup(
     ],
     packages=find_packages(exclude=("tests",)),
     include_package_data=True,
-    install_requires=["asyncpg", "json_strong_typing"],
+    install_requires=["asyncpg>=0.30", "json_strong_typing"],
+    extras_require={"numpy": ["numpy"]},
 )
@@ -23,6 +23,7 @@ from pylinsql.query.core import (
     month,
     now,
     p_1,
+    p_9,
     year,
 )
 from pylinsql.query.query import cache_info, insert_or_select, select
@@ -218,6 +219,29 @@ class TestLanguageIntegratedSQL(unittest.TestCase):
             select((p for p in entity(Person) if p.given_name == p_1)),
             """SELECT * FROM "Person" AS p WHERE p.given_name = $1""",
         )
+        self.assertQueryIs(
+            select((p for p in entity(Person) if p.given_name == p_9)),
+            """SELECT * FROM "Person" AS p WHERE p.given_name = $9""",
+        )
+
+    def test_where_constant(self):
+        # constants that compare equal but have a different representation are kept apart
+        self.assertQueryIs(
+            select(p for p in entity(Person) if p.id > 0.0),
+            """SELECT * FROM "Person" AS p WHERE p.id > 0.0""",
+        )
+        self.assertQueryIs(
+            select(p for p in entity(Person) if p.id > -0.0),
+            """SELECT * FROM "Person" AS p WHERE p.id > -0.0""",
+        )
+        self.assertQueryIs(
+            select(p for p in entity(Person) if p.id in (1, 2)),
+            """SELECT * FROM "Person" AS p WHERE p.id IN (1, 2)""",
+        )
+        self.assertQueryIs(
+            select(p for p in entity(Person) if p.id in (1.0, 2)),
+            """SELECT * FROM "Person" AS p WHERE p.id IN (1.0, 2)""",
+        )
 
     def test_where_date(self):
         self.assertQueryIs(
@@ -303,6 +327,23 @@ class TestLanguageIntegratedSQL(unittest.TestCase):
         # verify query string is the same
         self.assertEqual(query1, query2)
 
+    def test_query_cache(self):
+        # queries built from the same expression share the same query object
+        query1 = select(self.get_example_expr())
+        query2 = select(self.get_example_expr())
+        self.assertIs(query1, query2)
+
+        # expressions that reference closure variables are not cached
+        def select_with_subquery(subquery: Query) -> Query:
+            return select(p for p in entity(Person) if p.address_id in subquery)
+
+        query3 = select_with_subquery(select(a.id for a in entity(Address)))
+        query4 = select_with_subquery(
+            select(a.id for a in entity(Address) if a.city == "London")
+        )
+        self.assertIsNot(query3, query4)
+        self.assertNotEqual(query3.sql, query4.sql)
+
     def disabled_test_conj_in_yield(self):
         self.assertQueryIs(
             select(
@@ -1,21 +1,28 @@
+import dataclasses
 import datetime
 import os.path
 import unittest
 from dataclasses import dataclass
+from typing import List
 
+import asyncpg
 import pylinsql.async_database as async_database
 from pylinsql.async_database import DataAccess
-from pylinsql.query.core import DEFAULT, count, entity, inner_join
+from pylinsql.query.core import DEFAULT, count, entity, inner_join, p_1
 
 from tests.database import Address, Person, PersonCity
 from tests.database_test_case import DatabaseTestCase
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 @dataclass
 class Record:
     id: int
-    name: str
-    view_position: str
+    value: str
 
 
 @dataclass
@@ -58,6 +65,49 @@ class TestDatabaseConnection(DatabaseTestCase):
             values = await conn.typed_fetch(Record, query, "fourth")
             self.assertEmpty(values)
 
+    async def test_missing_column(self):
+        async with async_database.connection(self.params) as conn:
+            with self.assertRaises(RuntimeError):
+                await conn.typed_fetch(PersonFullName, "SELECT 1 AS id")
+
+    async def test_typed_fetchmany(self):
+        async with async_database.connection(self.params) as conn:
+            query = "SELECT $1::int AS id, $2::text AS value"
+            values = await conn.typed_fetchmany(
+                Record, query, [(1, "first"), (2, "second")]
+            )
+            self.assertEqual(values, [Record(1, "first"), Record(2, "second")])
+
+    async def test_typed_fetchmany_column(self):
+        async with async_database.connection(self.params) as conn:
+            values = await conn.typed_fetchmany_column(
+                str, "SELECT $1::int * 2", [(1,), (2,), (None,)]
+            )
+            self.assertEqual(values, ["2", "4", None])
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    async def test_typed_fetch_column_array(self):
+        async with async_database.connection(self.params) as conn:
+            values = await conn.typed_fetch_column_array(
+                numpy.float64, "SELECT generate_series(1, 5) AS value"
+            )
+            self.assertEqual(values.dtype, numpy.float64)
+            self.assertEqual(values.tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    async def test_mixed_case_schema(self):
+        async with async_database.connection(self.params) as conn:
+            await conn.raw_execute(
+                'CREATE SCHEMA IF NOT EXISTS "MixedCase"; CREATE TABLE IF NOT EXISTS "MixedCase"."Sample" (id INT)'
+            )
+        try:
+            params = dataclasses.replace(self.params, schema="MixedCase")
+            async with async_database.connection(params) as conn:
+                items = await conn.raw_fetch('SELECT * FROM "Sample"')
+                self.assertEmpty(items)
+        finally:
+            async with async_database.connection(self.params) as conn:
+                await conn.raw_execute('DROP SCHEMA "MixedCase" CASCADE')
+
     async def test_pool(self):
         async with async_database.pool(self.params) as pool:
             for _ in range(0, 25):
@@ -95,6 +145,26 @@ class TestDataTransfer(DatabaseTestCase):
     async def asyncTearDown(self):
         pass
 
+    def create_people(
+        self, family_name: str, size: int, start: int = None
+    ) -> List[Person]:
+        return [
+            Person(
+                id=DEFAULT if start is None else start + index,
+                birth_date=datetime.datetime(2000, 1, 1),
+                family_name=family_name,
+                given_name=f"Given{index}",
+                perm_address_id=1,
+                temp_address_id=None,
+            )
+            for index in range(size)
+        ]
+
+    async def count_people(self, conn, family_name: str) -> int:
+        return await conn.select_first(
+            (count(p.id) for p in entity(Person) if p.family_name == p_1), family_name
+        )
+
     async def test_select(self):
         async with async_database.connection(self.params) as conn:
             results = await conn.select(p for p in entity(Person))
@@ -127,6 +197,38 @@ class TestDataTransfer(DatabaseTestCase):
             self.assertEqual(result.given_name, "Abel")
             self.assertEqual(result.city, "Aberdeen")
 
+    async def test_select_iter(self):
+        async with async_database.connection(self.params) as conn:
+            # cursors are owned by the transaction of the caller
+            with self.assertRaises(RuntimeError):
+                conn.select_iter(p.given_name for p in entity(Person))
+
+            async with conn.transaction() as tx:
+                names = [
+                    name
+                    async for name in tx.select_iter(
+                        (p.given_name for p in entity(Person)), prefetch=2
+                    )
+                ]
+                self.assertCountEqual(names, ["Abel", "Benjamin", "John"])
+
+    async def test_select_iter_break(self):
+        async with async_database.connection(self.params) as conn:
+            async with conn.transaction() as tx:
+                async for name in tx.select_iter(
+                    (p.given_name for p in entity(Person)), prefetch=1
+                ):
+                    break
+
+                # the connection is free for other queries while the cursor is open
+                result = await tx.raw_fetchval("SELECT 42")
+                self.assertEqual(result, 42)
+
+            # the cursor is closed with the transaction
+            self.assertFalse(conn.conn.is_in_transaction())
+            result = await conn.raw_fetchval("SELECT 42")
+            self.assertEqual(result, 42)
+
     async def test_insert_or_select(self):
         async with async_database.connection(self.params) as conn:
             person_count = await conn.select_first(
@@ -229,6 +331,73 @@ class TestDataTransfer(DatabaseTestCase):
             )
             self.assertEqual(person_count, 1)
 
+    async def test_bulk_insert(self):
+        async with async_database.connection(self.params) as conn:
+            # batches below the threshold are sent with INSERT statements
+            await conn.bulk_insert(self.create_people("Insert", 5))
+            self.assertEqual(await self.count_people(conn, "Insert"), 5)
+
+            # batches at or above the threshold are streamed with COPY
+            await conn.bulk_insert(self.create_people("Copy", 5), copy_threshold=5)
+            self.assertEqual(await self.count_people(conn, "Copy"), 5)
+
+    async def test_bulk_insert_ignore_conflicts(self):
+        async with async_database.connection(self.params) as conn:
+            people = self.create_people("Conflict", 5, start=100)
+
+            # rows are copied into a temporary table, and then moved to the target table
+            await conn.bulk_insert(people[:2], ignore_conflicts=True, copy_threshold=1)
+            await conn.bulk_insert(people, ignore_conflicts=True, copy_threshold=1)
+            self.assertEqual(await self.count_people(conn, "Conflict"), 5)
+
+            # the temporary table is also dropped within an outer transaction
+            async with conn.transaction() as tx:
+                await tx.bulk_insert(people, ignore_conflicts=True, copy_threshold=1)
+                await tx.bulk_insert(people, ignore_conflicts=True, copy_threshold=1)
+            self.assertEqual(await self.count_people(conn, "Conflict"), 5)
+
+    async def test_insert_many_or_ignore(self):
+        async with async_database.connection(self.params) as conn:
+            await conn.insert_many_or_ignore([])
+            self.assertEqual(await self.count_people(conn, "Many"), 0)
+
+            # duplicates within the batch and rows inserted earlier are skipped
+            people = self.create_people("Many", 3, start=200)
+            await conn.insert_many_or_ignore(people + people)
+            self.assertEqual(await self.count_people(conn, "Many"), 3)
+
+            await conn.insert_many_or_ignore(people)
+            self.assertEqual(await self.count_people(conn, "Many"), 3)
+
+    async def test_select_concurrent(self):
+        async with async_database.pool(self.params) as pool:
+            people, addresses, americans = await pool.select_concurrent(
+                (p for p in entity(Person)),
+                (a for a in entity(Address)),
+                (
+                    (p.given_name for p in entity(Person) if p.family_name == p_1),
+                    "American",
+                ),
+            )
+            self.assertEqual(len(people), 3)
+            self.assertEqual(len(addresses), 5)
+            self.assertEqual(americans, ["Abel"])
+
+    async def test_transaction_options(self):
+        async with async_database.connection(self.params) as conn:
+            async with conn.transaction(isolation="serializable") as tx:
+                isolation = await tx.raw_fetchval("SHOW transaction_isolation")
+                self.assertEqual(isolation, "serializable")
+
+            async with conn.read_transaction() as tx:
+                readonly = await tx.raw_fetchval("SHOW transaction_read_only")
+                self.assertEqual(readonly, "on")
+
+            with self.assertRaises(asyncpg.exceptions.ReadOnlySQLTransactionError):
+                async with conn.read_transaction() as tx:
+                    await tx.insert_or_ignore(self.create_people("Reader", 1)[0])
+            self.assertEqual(await self.count_people(conn, "Reader"), 0)
+
 
 if __name__ == "__main__":
     unittest.main()